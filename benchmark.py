@@ -0,0 +1,603 @@
+# benchmark.py
+# --------------------------------------------------------------------------------
+# Performance benchmarks for Agri-AI.
+# Usage: python benchmark.py <benchmark> [options]
+#
+#   python benchmark.py suite --output bench.json        # training, inference, Flask
+#   python benchmark.py compare base.json bench.json     # flag regressions
+#   python benchmark.py generate-data --rows 1000000     # scaled-up training CSVs
+# --------------------------------------------------------------------------------
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def _timed(fn, repeat=5):
+    """Runs fn `repeat` times and returns the median wall time in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def _latency_stats(timings):
+    """Summary of per-call wall times (seconds) in milliseconds."""
+    ms = np.asarray(timings) * 1e3
+    return {'n': int(ms.size), 'mean_ms': round(float(ms.mean()), 3),
+            'p50_ms': round(float(np.percentile(ms, 50)), 3), 'p95_ms': round(float(np.percentile(ms, 95)), 3)}
+
+
+def _sample_latencies(fn, n, warmup=3):
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+# --------------------------------------------------------------------------------
+# Synthetic data: the training CSVs scaled up by resampling rows with small jitter
+# --------------------------------------------------------------------------------
+SYNTHETIC_SOURCES = {
+    # kind -> (source CSV, numeric columns to jitter, columns kept >= 0)
+    'crop': ('Crop_data.csv', ['N', 'P', 'K', 'temperature', 'humidity', 'pH', 'rainfall'],
+             ['N', 'P', 'K', 'humidity', 'rainfall']),
+    'fertilizer': ('Fertilizer_data.csv', ['Temp', 'Humidity', 'Soil Moisture', 'N', 'K', 'P', 'pH'],
+                   ['Humidity', 'Soil Moisture', 'N', 'K', 'P']),
+}
+
+
+def synthetic_data(kind, n_rows, file_path=None, seed=42, complete_rows=False):
+    """Returns a DataFrame shaped like the `kind` training CSV with n_rows resampled, jittered rows.
+
+    Missing values are resampled like any other (training drops them) unless
+    `complete_rows` is set, which samples only rows usable as model inputs.
+    """
+    source, numeric, non_negative = SYNTHETIC_SOURCES[kind]
+    data = pd.read_csv(file_path or source)
+    if complete_rows:
+        data = data.dropna().reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    sample = data.iloc[rng.integers(0, len(data), size=n_rows)].reset_index(drop=True)
+    noise = rng.normal(0.0, 0.02, size=(n_rows, len(numeric))) * data[numeric].std().to_numpy()
+    sample[numeric] = (sample[numeric].to_numpy(dtype=float) + noise).round(4)
+    sample[non_negative] = sample[non_negative].clip(lower=0)
+    return sample
+
+
+def write_synthetic_csv(kind, n_rows, path, chunk_rows=500_000, seed=42):
+    """Writes n_rows of synthetic `kind` data to `path` in chunks (memory stays flat for millions of rows)."""
+    written = 0
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        chunk = synthetic_data(kind, min(chunk_rows, n_rows - start), seed=seed + i)
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        written += len(chunk)
+    return written
+
+
+def synthetic_fertilizer_features(n_rows, file_path='Fertilizer_data.csv', seed=42):
+    """Scales the fertilizer training matrix to n_rows by resampling rows with small jitter."""
+    import data_ingestion
+
+    data = pd.read_csv(file_path).dropna()
+    base = data[['N', 'P', 'K', 'Temp', 'Humidity', 'pH']].to_numpy(dtype=float)
+    soil = data_ingestion.encode_soil(data['Soil Type'])[0].astype(float)
+    labels = data['Fertilizer Name'].to_numpy()
+
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(base), size=n_rows)
+    noise = rng.normal(0.0, 0.02, size=(n_rows, base.shape[1])) * base.std(axis=0)
+    X = np.column_stack([base[idx] + noise, soil[idx]])
+    return X, labels[idx]
+
+
+# --------------------------------------------------------------------------------
+# Fertilizer KNN: indexed (KD-tree / ball-tree) vs brute-force query latency
+# --------------------------------------------------------------------------------
+def bench_fertilizer_index(sizes, algorithms, leaf_size, batch_size):
+    import fertilizer_recommender
+
+    print(f"{'rows':>10} {'index':>10} {'fit (s)':>9} {'1-row (ms)':>11} {f'{batch_size}-rows (ms)':>14}")
+    for n_rows in sizes:
+        X, y = synthetic_fertilizer_features(n_rows)
+        queries = synthetic_fertilizer_features(batch_size, seed=7)[0]
+        for algorithm in algorithms:
+            model = fertilizer_recommender.build_fertilizer_model(algorithm=algorithm, leaf_size=leaf_size)
+            start = time.perf_counter()
+            model.fit(X, y)
+            fit_time = time.perf_counter() - start
+
+            single = _timed(lambda: model.predict_proba(queries[:1]))
+            batch = _timed(lambda: model.predict_proba(queries), repeat=3)
+            print(f"{n_rows:>10} {algorithm:>10} {fit_time:>9.2f} {single * 1e3:>11.2f} {batch * 1e3:>14.1f}")
+
+
+# --------------------------------------------------------------------------------
+# Per-worker memory with private vs shared (memory-mapped / preloaded) models
+# --------------------------------------------------------------------------------
+def _memory_kb():
+    """Returns {'rss', 'pss', 'private'} in kB for this process (PSS needs Linux /proc)."""
+    usage = {'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 'pss': None, 'private': None}
+    try:
+        with open('/proc/self/smaps_rollup') as fh:
+            fields = dict(line.split(':', 1) for line in fh if ':' in line and not line.startswith('0'))
+        kb = lambda name: int(fields[name].split()[0])
+        usage = {'rss': kb('Rss'), 'pss': kb('Pss'), 'private': kb('Private_Clean') + kb('Private_Dirty')}
+    except (OSError, KeyError, ValueError):
+        pass
+    return usage
+
+
+def _load_models():
+    import crop_recommender
+    import fertilizer_recommender
+
+    crop_recommender.load_or_train_crop_model()
+    fertilizer_recommender.load_or_train_fertilizer_model()
+
+
+def _touch_models():
+    """Exercises every model array the way serving does."""
+    import crop_recommender
+    import fertilizer_recommender
+
+    crop_recommender.recommend_crops_batch(np.zeros((512, len(crop_recommender.CROP_FEATURES))))
+    crop_recommender.rank_crops(90, 42, 43, 20.8, 82.0, 6.5, 202.9)
+    fertilizer_recommender.recommend_fertilizer(20, 20, 20, 25, 60, 6.5, 'Loamy')
+
+
+def _memory_worker(mmap_mode, preloaded, barrier, results):
+    import model_store
+
+    before = _memory_kb()
+    if not preloaded:
+        model_store.ARTIFACT_MMAP_MODE = mmap_mode
+        _load_models()
+    _touch_models()
+    barrier.wait()  # all workers hold their models at the same time
+    results.put((before, _memory_kb()))
+    barrier.wait()
+
+
+def _preloading_master(workers, barrier, results):
+    """Loads the models once, then forks the workers (gunicorn preload_app)."""
+    import gc
+    import model_store
+
+    model_store.ARTIFACT_MMAP_MODE = 'r'
+    _load_models()
+    gc.collect()
+    gc.freeze()
+    ctx = multiprocessing.get_context('fork')
+    procs = [ctx.Process(target=_memory_worker, args=('r', True, barrier, results)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
+
+def bench_shared_memory(workers):
+    # Build the artifacts in a separate process so this one forks workers without models
+    prepare = multiprocessing.get_context('spawn').Process(target=_load_models)
+    prepare.start()
+    prepare.join()
+    ctx = multiprocessing.get_context('fork')
+
+    print(f"Per-worker memory with {workers} workers (kB; PSS splits shared pages between processes)")
+    print(f"{'mode':>22} {'RSS before':>11} {'RSS after':>10} {'PSS after':>10} {'private after':>14}")
+    for label, mmap_mode, preload in [('private copies', None, False),
+                                      ('memory-mapped', 'r', False),
+                                      ('preload + mmap (CoW)', 'r', True)]:
+        barrier, results = ctx.Barrier(workers), ctx.Queue()
+        if preload:
+            procs = [ctx.Process(target=_preloading_master, args=(workers, barrier, results))]
+        else:
+            procs = [ctx.Process(target=_memory_worker, args=(mmap_mode, False, barrier, results))
+                     for _ in range(workers)]
+        for proc in procs:
+            proc.start()
+        samples = [results.get() for _ in range(workers)]
+        for proc in procs:
+            proc.join()
+
+        mean = lambda key, idx: np.mean([s[idx][key] or 0 for s in samples])
+        print(f"{label:>22} {mean('rss', 0):>11,.0f} {mean('rss', 1):>10,.0f} "
+              f"{mean('pss', 1):>10,.0f} {mean('private', 1):>14,.0f}")
+
+
+# --------------------------------------------------------------------------------
+# Data ingestion: untyped CSV vs typed CSV vs the Parquet cache
+# --------------------------------------------------------------------------------
+INGESTION_MODES = ['untyped csv', 'typed csv', 'parquet cache']
+
+
+def _reset_peak_rss():
+    """Resets the kernel's peak-RSS mark (Linux) and returns the current RSS in kB."""
+    with open('/proc/self/clear_refs', 'w') as fh:
+        fh.write('5')
+    return _proc_status_kb('VmRSS')
+
+
+def _proc_status_kb(field):
+    with open('/proc/self/status') as fh:
+        for line in fh:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _ingestion_worker(mode, kind, path, cache_dir, results):
+    import data_ingestion
+
+    dtypes = data_ingestion.CROP_DTYPES if kind == 'crop' else data_ingestion.FERTILIZER_DTYPES
+    if mode == 'parquet cache':
+        import pyarrow  # noqa: F401  (imported before the baseline, like a warm server)
+    before = _reset_peak_rss()
+    start = time.perf_counter()
+    if mode == 'untyped csv':
+        data = pd.read_csv(path)  # the loaders before data_ingestion
+    else:
+        # The cache lookup includes hashing the CSV, which decides whether the cache is valid
+        data = data_ingestion.read_typed_csv(path, dtypes, cache_dir=cache_dir, use_cache=mode == 'parquet cache')
+    seconds = time.perf_counter() - start
+    peak_kb = _proc_status_kb('VmHWM') - before
+    results.put((seconds, peak_kb, int(data.memory_usage(deep=True).sum())))
+
+
+def bench_ingestion(scale, kinds):
+    """Load time and peak memory per loader, each in a fresh process, at `scale` x the shipped data."""
+    import data_ingestion
+
+    modes = INGESTION_MODES if data_ingestion._parquet_available() else INGESTION_MODES[:2]
+    data_dir = tempfile.mkdtemp(prefix='agri-ai-bench-ingest-')
+    ctx = multiprocessing.get_context('spawn')
+    print(f"{'data':>22} {'loader':>14} {'seconds':>8} {'peak MB':>8} {'frame MB':>9}")
+    for kind in kinds:
+        source = SYNTHETIC_SOURCES[kind][0]
+        rows = (sum(1 for _ in open(source)) - 1) * scale
+        path = os.path.join(data_dir, f"{kind}.csv")
+        write_synthetic_csv(kind, rows, path)
+        if 'parquet cache' in modes:
+            dtypes = data_ingestion.CROP_DTYPES if kind == 'crop' else data_ingestion.FERTILIZER_DTYPES
+            data_ingestion.read_typed_csv(path, dtypes, cache_dir=data_dir, use_cache=True)  # warm the cache
+        for mode in modes:
+            results = ctx.Queue()
+            proc = ctx.Process(target=_ingestion_worker, args=(mode, kind, path, data_dir, results))
+            proc.start()
+            seconds, peak_kb, frame_bytes = results.get()
+            proc.join()
+            print(f"{f'{kind} ({rows:,} rows)':>22} {mode:>14} {seconds:>8.3f} {peak_kb / 1024:>8.1f} "
+                  f"{frame_bytes / 2**20:>9.1f}")
+
+
+# --------------------------------------------------------------------------------
+# Login throughput: inline hashing on request threads vs the bounded hashing pool
+# --------------------------------------------------------------------------------
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else float('nan')
+
+
+def bench_login_throughput(clients, seconds, method, workers, max_pending):
+    import threading
+    from werkzeug.security import check_password_hash, generate_password_hash
+    from password_hashing import PasswordHasher, PasswordHashingBusy
+
+    stored = generate_password_hash('correct horse', method) if method else generate_password_hash('correct horse')
+    print(f"{clients} concurrent clients for {seconds}s, hash {stored.split('$', 1)[0]}; "
+          f"'probe' is a cheap request served alongside the logins")
+    print(f"{'mode':>14} {'logins/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'429s':>6} {'probe p95 (ms)':>15}")
+
+    for label in ['inline', 'bounded pool']:
+        hasher = PasswordHasher(method, workers, max_pending)
+        verify = (lambda: check_password_hash(stored, 'correct horse')) if label == 'inline' \
+            else (lambda: hasher.verify(stored, 'correct horse'))
+        latencies, probes, rejected = [], [], [0]
+        deadline = time.perf_counter() + seconds
+
+        def client():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    verify()
+                    latencies.append(time.perf_counter() - start)
+                except PasswordHashingBusy:
+                    rejected[0] += 1
+                    time.sleep(0.05)  # the browser backs off before retrying
+
+        def probe():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                sum(range(2_000))
+                probes.append(time.perf_counter() - start)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=client) for _ in range(clients)] + [threading.Thread(target=probe)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        print(f"{label:>14} {len(latencies) / seconds:>9.1f} {_percentile(latencies, 50) * 1e3:>9.0f} "
+              f"{_percentile(latencies, 95) * 1e3:>9.0f} {rejected[0]:>6} {_percentile(probes, 95) * 1e3:>15.2f}")
+
+
+# --------------------------------------------------------------------------------
+# Suite: training time, inference latency and Flask throughput as JSON
+# --------------------------------------------------------------------------------
+def bench_training(crop_path='Crop_data.csv', fert_path='Fertilizer_data.csv'):
+    """Wall time of one full training run per model (nothing is saved or activated)."""
+    import crop_recommender
+    import fertilizer_recommender
+
+    results = {}
+    for name, train, path in [('crop', crop_recommender.train_crop_model, crop_path),
+                              ('fertilizer', fertilizer_recommender.train_fertilizer_model, fert_path)]:
+        start = time.perf_counter()
+        trained = train(path)
+        results[name] = {'seconds': round(time.perf_counter() - start, 3),
+                         'rows': int(sum(1 for _ in open(path)) - 1), 'accuracy': round(float(trained[-1]), 4)}
+    return results
+
+
+def bench_inference(n_single=200, batch_size=1_000):
+    """Single-row latency of recommend_crop/recommend_fertilizer and batched per-row cost."""
+    import crop_recommender
+    import fertilizer_recommender
+
+    _load_models()
+    crops = synthetic_data('crop', batch_size, seed=3, complete_rows=True)
+    ferts = synthetic_data('fertilizer', batch_size, seed=4, complete_rows=True)
+    crop_rows = crops[['N', 'P', 'K', 'temperature', 'humidity', 'pH', 'rainfall']].to_numpy(dtype=float)
+    fert_rows = ferts[['N', 'P', 'K', 'Temp', 'Humidity', 'pH', 'Soil Type']].values.tolist()
+
+    # Cycle through distinct rows so repeated inputs don't just measure the result cache
+    crop_inputs, fert_inputs = itertools.cycle(crop_rows), itertools.cycle(fert_rows)
+    single_crop = _sample_latencies(lambda: crop_recommender.recommend_crop(*next(crop_inputs)), n_single)
+    single_fert = _sample_latencies(lambda: fertilizer_recommender.recommend_fertilizer(*next(fert_inputs)), n_single)
+    batch_crop = _sample_latencies(lambda: crop_recommender.recommend_crops_batch(crop_rows), 10, warmup=1)
+    batch_fert = _sample_latencies(lambda: fertilizer_recommender.recommend_fertilizers_batch(fert_rows), 10, warmup=1)
+
+    per_row = lambda timings: round(float(np.median(timings)) / batch_size * 1e6, 3)
+    return {
+        'recommend_crop': _latency_stats(single_crop),
+        'recommend_fertilizer': _latency_stats(single_fert),
+        f'crop_batch_{batch_size}': {**_latency_stats(batch_crop), 'per_row_us': per_row(batch_crop)},
+        f'fertilizer_batch_{batch_size}': {**_latency_stats(batch_fert), 'per_row_us': per_row(batch_fert)},
+    }
+
+
+def bench_flask(n_requests=200, concurrency=1):
+    """Requests/s and latency for /, /login and /recommender via the Flask test client.
+
+    Uses a throwaway SQLite database, so users.db is never touched.
+    """
+    import threading
+
+    db_dir = tempfile.mkdtemp(prefix='agri-ai-bench-')
+    os.environ['AGRI_AI_DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    os.environ.setdefault('AGRI_AI_MODEL_WATCH_INTERVAL', '0')
+    import app as agri_app
+
+    flask_app = agri_app.app
+    if not agri_app.model_loader.wait(300):
+        raise RuntimeError(f"Models failed to load: {agri_app.model_loader.error}")
+    with flask_app.app_context():
+        agri_app.db.create_all()
+    credentials = {'username': 'bench', 'password': 'bench-password'}
+    flask_app.test_client().post('/signup', data=credentials)
+
+    form = {'N': 90, 'P': 42, 'K': 43, 'pH': 6.5, 'temp': 20.87, 'hum': 82, 'rain': 202.93, 'soil_type': 'Loamy'}
+    scenarios = {
+        'GET /': lambda client, i: client.get('/?state=Maharashtra&city=Pune'),
+        'POST /login': lambda client, i: client.post('/login', data=credentials),
+        # Vary N so most requests miss the recommendation cache
+        'POST /recommender': lambda client, i: client.post('/recommender', data={**form, 'N': 50 + i % 97 + (i // 97) / 100}),
+    }
+
+    results = {}
+    for name, request_fn in scenarios.items():
+        timings, errors, lock = [], [0], threading.Lock()
+        # Clients log in before the clock starts
+        started = threading.Barrier(concurrency + 1)
+
+        def worker(offset):
+            client = flask_app.test_client()
+            if name != 'POST /login':
+                client.post('/login', data=credentials)
+            else:
+                client.get('/logout')
+            started.wait()
+            for i in range(offset, n_requests, concurrency):
+                start = time.perf_counter()
+                response = request_fn(client, i)
+                elapsed = time.perf_counter() - start
+                if name == 'POST /login':
+                    client.get('/logout')
+                with lock:
+                    timings.append(elapsed)
+                    errors[0] += response.status_code >= 400
+
+        threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        started.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+        results[name] = {**_latency_stats(timings), 'requests_per_s': round(len(timings) / wall, 1), 'errors': errors[0]}
+    return results
+
+
+def _environment():
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(), 'sklearn': sklearn.__version__, 'numpy': np.__version__,
+        'pandas': pd.__version__, 'cpus': os.cpu_count(), 'platform': platform.platform(),
+    }
+
+
+def run_suite(sections, train_rows=None, n_single=200, batch_size=1_000, n_requests=200, concurrency=1):
+    """Runs the selected suite sections and returns a JSON-serializable result dict."""
+    results = {'environment': _environment()}
+    if 'training' in sections:
+        if train_rows:
+            data_dir = tempfile.mkdtemp(prefix='agri-ai-bench-data-')
+            crop_path, fert_path = os.path.join(data_dir, 'crop.csv'), os.path.join(data_dir, 'fertilizer.csv')
+            write_synthetic_csv('crop', train_rows, crop_path)
+            write_synthetic_csv('fertilizer', train_rows, fert_path)
+            results['training'] = bench_training(crop_path, fert_path)
+        else:
+            results['training'] = bench_training()
+    if 'inference' in sections:
+        results['inference'] = bench_inference(n_single, batch_size)
+    if 'flask' in sections:
+        results['flask'] = bench_flask(n_requests, concurrency)
+    return results
+
+
+def _flatten(results, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}, numeric leaves only."""
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+# Metrics where bigger is better; every other *_ms / *_us / seconds metric is a cost
+_HIGHER_IS_BETTER = ('requests_per_s', 'accuracy')
+_COST_SUFFIXES = ('_ms', '_us', 'seconds')
+
+
+def compare_results(baseline, current, threshold=0.10):
+    """Returns [(metric, baseline, current, change)] for metrics that got worse by more than `threshold`."""
+    old, new = _flatten(baseline), _flatten(current)
+    regressions = []
+    for metric in sorted(old.keys() & new.keys()):
+        if old[metric] == 0 or metric.startswith('environment.'):
+            continue
+        change = (new[metric] - old[metric]) / abs(old[metric])
+        if metric.endswith(_HIGHER_IS_BETTER):
+            worse = change < -threshold
+        elif metric.endswith(_COST_SUFFIXES):
+            worse = change > threshold
+        else:
+            continue
+        if worse:
+            regressions.append((metric, old[metric], new[metric], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agri-AI performance benchmarks.")
+    sub = parser.add_subparsers(dest='benchmark', required=True)
+
+    fert = sub.add_parser('fertilizer-index', help="KNN query latency per index type as the dataset grows.")
+    fert.add_argument('--sizes', type=int, nargs='+', default=[9_000, 100_000, 1_000_000])
+    fert.add_argument('--algorithms', nargs='+', default=['brute', 'kd_tree', 'ball_tree'])
+    fert.add_argument('--leaf-size', type=int, default=30)
+    fert.add_argument('--batch-size', type=int, default=1_000)
+
+    mem = sub.add_parser('shared-memory', help="Per-worker RSS/PSS with private, memory-mapped and preloaded models.")
+    mem.add_argument('--workers', type=int, default=4)
+
+    login = sub.add_parser('login-throughput', help="Concurrent login throughput with inline vs pooled password hashing.")
+    login.add_argument('--clients', type=int, default=32)
+    login.add_argument('--seconds', type=float, default=10)
+    login.add_argument('--method', default=None, help="werkzeug hash method (default: werkzeug's default)")
+    login.add_argument('--workers', type=int, default=None)
+    login.add_argument('--max-pending', type=int, default=8)
+
+    ingest = sub.add_parser('ingestion', help="Training-data load time and peak memory: CSV vs typed vs Parquet cache.")
+    ingest.add_argument('--scale', type=int, default=10, help="Multiple of the shipped CSVs' row counts")
+    ingest.add_argument('--kinds', nargs='+', choices=['crop', 'fertilizer'], default=['crop', 'fertilizer'])
+
+    suite = sub.add_parser('suite', help="Training, inference and Flask benchmarks, written as JSON.")
+    suite.add_argument('--sections', nargs='+', choices=['training', 'inference', 'flask'],
+                       default=['training', 'inference', 'flask'])
+    suite.add_argument('--output', default=None, help="JSON results file (default: stdout)")
+    suite.add_argument('--train-rows', type=int, default=None, help="Train on synthetic data of this many rows")
+    suite.add_argument('--single-calls', type=int, default=200)
+    suite.add_argument('--batch-size', type=int, default=1_000)
+    suite.add_argument('--requests', type=int, default=200, help="Requests per Flask scenario")
+    suite.add_argument('--concurrency', type=int, default=1)
+
+    compare = sub.add_parser('compare', help="Report metrics that regressed between two suite JSON files.")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.10, help="Relative change treated as a regression")
+
+    gen = sub.add_parser('generate-data', help="Write scaled-up synthetic Crop/Fertilizer CSVs.")
+    gen.add_argument('--rows', type=int, default=1_000_000)
+    gen.add_argument('--kinds', nargs='+', choices=['crop', 'fertilizer'], default=['crop', 'fertilizer'])
+    gen.add_argument('--out-dir', default='bench_data')
+    gen.add_argument('--seed', type=int, default=42)
+
+    args = parser.parse_args(argv)
+    if args.benchmark == 'fertilizer-index':
+        bench_fertilizer_index(args.sizes, args.algorithms, args.leaf_size, args.batch_size)
+    elif args.benchmark == 'shared-memory':
+        bench_shared_memory(args.workers)
+    elif args.benchmark == 'login-throughput':
+        bench_login_throughput(args.clients, args.seconds, args.method, args.workers, args.max_pending)
+    elif args.benchmark == 'ingestion':
+        bench_ingestion(args.scale, args.kinds)
+    elif args.benchmark == 'suite':
+        results = run_suite(args.sections, args.train_rows, args.single_calls, args.batch_size,
+                            args.requests, args.concurrency)
+        text = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, 'w') as fh:
+                fh.write(text + '\n')
+            print(f"💾 Results written to {args.output}")
+        else:
+            print(text)
+    elif args.benchmark == 'compare':
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        with open(args.current) as fh:
+            current = json.load(fh)
+        regressions = compare_results(baseline, current, args.threshold)
+        for metric, old, new, change in regressions:
+            print(f"Warning: {metric} regressed {change:+.1%} ({old} -> {new})")
+        if not regressions:
+            print(f"✅ No regressions beyond {args.threshold:.0%}")
+        return 1 if regressions else 0
+    elif args.benchmark == 'generate-data':
+        os.makedirs(args.out_dir, exist_ok=True)
+        for kind in args.kinds:
+            path = os.path.join(args.out_dir, f"{kind}_{args.rows}.csv")
+            start = time.perf_counter()
+            rows = write_synthetic_csv(kind, args.rows, path, seed=args.seed)
+            print(f"💾 {rows:,} {kind} rows written to {path} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
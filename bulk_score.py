@@ -0,0 +1,149 @@
+# bulk_score.py
+# --------------------------------------------------------------------------------
+# Streaming bulk scoring of large soil-test CSV files.
+# The input is read in fixed-size chunks, each chunk is scored with the vectorized
+# batch models (optionally on a process pool), and results are appended to the
+# output as they arrive, so memory stays flat regardless of input size.
+#
+# Usage: python bulk_score.py soil_tests.csv scored.parquet --chunk-size 100000 --workers 4
+# --------------------------------------------------------------------------------
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import crop_recommender
+import fertilizer_recommender
+
+# Accepted input column names -> canonical names used below
+COLUMN_ALIASES = {
+    'temperature': 'temp', 'Temp': 'temp',
+    'humidity': 'hum', 'Humidity': 'hum',
+    'pH': 'ph',
+    'rainfall': 'rain',
+    'Soil Type': 'soil_type',
+}
+CROP_INPUTS = ['N', 'P', 'K', 'temp', 'hum', 'ph', 'rain']
+FERTILIZER_INPUTS = ['N', 'P', 'K', 'temp', 'hum', 'ph', 'soil_type']
+
+
+def load_models(crop_data='Crop_data.csv', fert_data='Fertilizer_data.csv', models=('crop', 'fertilizer')):
+    """Loads the saved model artifacts (training only if they are missing or stale)."""
+    ok = True
+    if 'crop' in models:
+        ok = crop_recommender.load_or_train_crop_model(crop_data) and ok
+    if 'fertilizer' in models:
+        ok = fertilizer_recommender.load_or_train_fertilizer_model(fert_data) and ok
+    if not ok:
+        raise RuntimeError("Could not load the ML models.")
+
+
+def score_chunk(chunk, models=('crop', 'fertilizer')):
+    """Returns `chunk` with recommendation columns appended."""
+    inputs = chunk.rename(columns=COLUMN_ALIASES)
+    result = chunk.copy()
+
+    if 'crop' in models:
+        crop_rows = inputs[CROP_INPUTS].to_numpy(dtype=float)
+        labels, confidences = crop_recommender.recommend_crops_batch(crop_rows)
+        result['crop'] = labels
+        result['crop_confidence'] = confidences.round(2)
+
+    if 'fertilizer' in models:
+        fert_rows = inputs[FERTILIZER_INPUTS].rename(columns={'hum': 'humidity'})
+        labels, confidences = fertilizer_recommender.recommend_fertilizers_batch(fert_rows)
+        result['fertilizer'] = labels
+        result['fertilizer_confidence'] = confidences.round(2)
+    return result
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file (chosen by the file extension)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.is_parquet = path.endswith(('.parquet', '.pq'))
+        self._parquet_writer = None
+        self._wrote_csv_header = False
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, frame):
+        if self.is_parquet:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow).")
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table.cast(self._parquet_writer.schema))
+        else:
+            frame.to_csv(self.path, mode='a', header=not self._wrote_csv_header, index=False)
+            self._wrote_csv_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def score_file(input_path, output_path, chunk_size=100_000, workers=1, models=('crop', 'fertilizer'),
+               crop_data='Crop_data.csv', fert_data='Fertilizer_data.csv'):
+    """Scores input_path chunk by chunk into output_path. Returns (rows, seconds)."""
+    chunks = pd.read_csv(input_path, chunksize=chunk_size)
+    writer = ChunkWriter(output_path)
+    rows, start = 0, time.perf_counter()
+
+    def report(frame):
+        nonlocal rows
+        writer.write(frame)
+        rows += len(frame)
+        elapsed = time.perf_counter() - start
+        print(f"   {rows:,} rows scored ({rows / elapsed:,.0f} rows/s)")
+
+    try:
+        if workers <= 1:
+            load_models(crop_data, fert_data, models)
+            for chunk in chunks:
+                report(score_chunk(chunk, models))
+        else:
+            with ProcessPoolExecutor(workers, initializer=load_models, initargs=(crop_data, fert_data, models)) as pool:
+                # Keep at most 2 chunks per worker in flight so memory stays bounded,
+                # and write results in input order.
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(score_chunk, chunk, models))
+                    if len(pending) >= workers * 2:
+                        report(pending.popleft().result())
+                while pending:
+                    report(pending.popleft().result())
+    finally:
+        writer.close()
+
+    return rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a large soil-test CSV with the crop and fertilizer models.")
+    parser.add_argument('input', help="CSV with N, P, K, temp/temperature, hum/humidity, ph/pH, rain/rainfall and soil_type/'Soil Type' columns")
+    parser.add_argument('output', help="Output .csv or .parquet file")
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=1, help="Score chunks on a pool of this many processes")
+    parser.add_argument('--models', nargs='+', choices=['crop', 'fertilizer'], default=['crop', 'fertilizer'])
+    parser.add_argument('--crop-data', default='Crop_data.csv')
+    parser.add_argument('--fert-data', default='Fertilizer_data.csv')
+    args = parser.parse_args(argv)
+
+    print(f"--- Bulk scoring {args.input} -> {args.output} ---")
+    rows, seconds = score_file(args.input, args.output, args.chunk_size, args.workers, tuple(args.models),
+                               args.crop_data, args.fert_data)
+    print(f"✅ Scored {rows:,} rows in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -3,52 +3,370 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 import numpy as np
+import os
+import pickle
+import time
+
+import data_ingestion
+import hyperparameter_sweep
+import metrics
+import model_store
+from forest_engine import CompiledForest, rank_trees
 
 # Global variable to hold the trained model and features
 CROP_MODEL = None
 CROP_FEATURES = ['N', 'P', 'K', 'temperature', 'humidity', 'pH', 'rainfall']
+CROP_MODEL_VERSION = None
+CROP_MODEL_ACCURACY = None # Holdout accuracy measured when the model was trained
+CROP_ARTIFACT_NAME = 'crop_model'
+CROP_TOP_K = 3 # Number of ranked crops (best + alternatives) shown to the user
 
-def load_and_train_crop_model(file_path='Crop_data.csv'):
-    """Loads data, trains the Crop Recommendation Model, and stores it."""
-    global CROP_MODEL
+# Forest hyperparameters (overridden by the best sweep result with
+# AGRI_AI_USE_SWEEP_PARAMS=1, see hyperparameter_sweep.py) and the number of cores
+# used to fit it (-1 = all cores).
+CROP_N_ESTIMATORS = 100
+CROP_MAX_DEPTH = None
+CROP_TRAINING_JOBS = int(os.environ.get('AGRI_AI_TRAINING_JOBS', -1))
+
+# Optional budget for small edge deployments: model arrays in MB and median
+# single-row latency in µs (measured on the training machine). When either is set,
+# training serves the most accurate compacted forest or distilled student that fits
+# (see compact_crop_model) instead of the full forest.
+CROP_MAX_MB = float(os.environ['AGRI_AI_CROP_MAX_MB']) if os.environ.get('AGRI_AI_CROP_MAX_MB') else None
+CROP_MAX_LATENCY_US = (float(os.environ['AGRI_AI_CROP_MAX_LATENCY_US'])
+                       if os.environ.get('AGRI_AI_CROP_MAX_LATENCY_US') else None)
+# Compaction candidates: tree subsets x depth caps, and (n_estimators, max_depth) students
+COMPACT_TREE_COUNTS = (100, 50, 25, 10, 5)
+COMPACT_MAX_DEPTHS = (None, 12, 8, 6)
+DISTILLED_STUDENTS = ((20, None), (10, None), (5, None), (10, 8))
+
+# Optional NumPy-native inference engine (see forest_engine.py). It removes sklearn's
+# per-call overhead for single rows and small batches; larger batches, where sklearn's
+# compiled tree walk wins, still go through CROP_MODEL.
+USE_COMPILED_FOREST = os.environ.get('AGRI_AI_COMPILED_FOREST', '1') == '1'
+COMPILED_FOREST_MAX_BATCH = 256
+CROP_ENGINE = None
+
+# The active model, engine and version as one dict. Predictions read it once per call
+# and a reload replaces it with a single assignment, so swapping models is atomic and
+# in-flight requests finish on the model they started with.
+CROP_BUNDLE = None
+
+def _crop_bundle(model, version, accuracy, engine=None):
+    """The bundle dict for `model` (see CROP_BUNDLE), building its compiled engine if needed."""
+    if not USE_COMPILED_FOREST:
+        engine = None
+    elif engine is None:
+        # A compacted model (see compact_crop_model) is its own engine
+        engine = model if isinstance(model, CompiledForest) else CompiledForest.from_sklearn(model)
+    return {'model': model, 'engine': engine, 'version': version, 'accuracy': accuracy}
+
+def _install_crop_model(model, version, accuracy, engine=None):
+    """Makes `model` the active crop model (building its compiled engine if needed)."""
+    global CROP_BUNDLE, CROP_MODEL, CROP_ENGINE, CROP_MODEL_VERSION, CROP_MODEL_ACCURACY
+    CROP_BUNDLE = _crop_bundle(model, version, accuracy, engine)
+    CROP_MODEL, CROP_ENGINE, CROP_MODEL_VERSION, CROP_MODEL_ACCURACY = model, CROP_BUNDLE['engine'], version, accuracy
+    model_store.notify_model_changed(CROP_ARTIFACT_NAME)
+
+def crop_budget():
+    """The size/latency budget a saved model must have been built for to be reused."""
+    return {'max_mb': CROP_MAX_MB, 'max_latency_us': CROP_MAX_LATENCY_US}
+
+def crop_hyperparameters(data_hash=None):
+    """The forest hyperparameters training uses for the data with `data_hash`."""
+    params = {'n_estimators': CROP_N_ESTIMATORS, 'max_depth': CROP_MAX_DEPTH}
+    params.update(hyperparameter_sweep.tuned_params('crop', data_hash))
+    return params
 
+def build_crop_model(n_estimators=None, max_depth=None, n_jobs=None):
+    """Returns an unfitted random forest using the configured hyperparameters."""
+    return RandomForestClassifier(
+        n_estimators=n_estimators or CROP_N_ESTIMATORS,
+        max_depth=max_depth if max_depth is not None else CROP_MAX_DEPTH,
+        n_jobs=n_jobs if n_jobs is not None else CROP_TRAINING_JOBS,
+        random_state=42,
+    )
+
+def crop_training_split(file_path='Crop_data.csv', data_hash=None):
+    """Reads the crop data and returns (X_train, X_test, y_train, y_test), or None if missing."""
     try:
-        data = pd.read_csv(file_path)
+        # float32 features (what the trees split on anyway), from the Parquet cache when unchanged
+        data = data_ingestion.load_crop_data(file_path, data_hash)
     except FileNotFoundError:
         print(f"Error: Crop data file not found at {file_path}. Did you put the 'Crop_data.csv' in the project folder?")
-        return False
+        return None
 
     X = data[CROP_FEATURES]
-    y = data['label'] # 'label' column is the crop name
+    y = data['label'].astype(str) # 'label' column is the crop name
 
-    # Train a new model (or load from disk in a real application)
-    X_train, X_test, y_train, y_test = train_test_split(
+    return train_test_split(
         X, y, test_size=0.2, shuffle=True, random_state=42
     )
-    
-    CROP_MODEL = RandomForestClassifier(n_estimators=100, random_state=42)
-    CROP_MODEL.fit(X_train, y_train)
-    
-    # Optional: Print accuracy on test set
-    accuracy = CROP_MODEL.score(X_test, y_test)
+
+def _fit_crop_model(X_train, y_train, n_estimators=None, max_depth=None):
+    # The trees are fitted in parallel; the fit is identical for any n_jobs
+    model = build_crop_model(n_estimators, max_depth)
+    model.fit(X_train, y_train)
+    # Serve single-threaded: per-call thread dispatch would dwarf small predictions
+    model.set_params(n_jobs=None)
+    return model
+
+def _single_row_latency_us(predict_proba, X, calls=300):
+    """Median wall time of one single-row predict_proba call, in µs."""
+    timings = []
+    for i in range(calls):
+        row = X[i % len(X):i % len(X) + 1]
+        start = time.perf_counter()
+        predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+def distill_crop_model(teacher, X_train, n_estimators, max_depth=None, copies=4, noise=0.05, seed=42):
+    """Trains a small forest to mimic `teacher` (a fitted forest or CompiledForest).
+
+    The student learns the teacher's predictions on the training inputs plus `copies`
+    jittered copies (Gaussian noise of `noise` x each feature's std), so it also
+    follows the teacher between the training points.
+    """
+    rng = np.random.default_rng(seed)
+    X = np.asarray(X_train, dtype=np.float32)
+    jitter = X.std(axis=0) * noise
+    augmented = np.vstack([X] + [X + rng.normal(size=X.shape).astype(np.float32) * jitter for _ in range(copies)])
+    if not isinstance(teacher, CompiledForest):
+        teacher = CompiledForest.from_sklearn(teacher)
+    return _fit_crop_model(pd.DataFrame(augmented, columns=CROP_FEATURES), teacher.predict(augmented),
+                           n_estimators, max_depth)
+
+def compact_crop_model(model, X_train, X_test, y_test, max_mb=None, max_latency_us=None, distill=True):
+    """Finds the most accurate compact version of a fitted crop forest within a budget.
+
+    Candidates are the forest's most representative trees (rank_trees) at several
+    counts and depth caps, stored with uint16 leaves, plus (with `distill`) small
+    students trained on the forest's predictions. Each is scored on the holdout split
+    and timed on single rows. Prints the trade-off table against the full model and
+    returns (chosen candidate, all candidates); a candidate is a dict with 'engine',
+    'accuracy', 'mb' and 'latency_us'. If nothing fits, the smallest candidate wins.
+    """
+    X_test32 = np.asarray(X_test, dtype=np.float32)
+    y_test = np.asarray(y_test)
+
+    def evaluate(name, engine, max_depth=None):
+        predicted = engine.classes_[engine.predict_proba(X_test32).argmax(axis=1)]
+        return {'name': name, 'trees': engine.n_trees, 'max_depth': max_depth, 'engine': engine,
+                'mb': engine.nbytes / 1e6, 'latency_us': _single_row_latency_us(engine.predict_proba, X_test32),
+                'accuracy': float((predicted == y_test).mean())}
+
+    sklearn_latency = _single_row_latency_us(
+        lambda row: model.predict_proba(pd.DataFrame(row, columns=CROP_FEATURES)), X_test32, calls=50)
+    reference = [
+        {'name': 'current (sklearn)', 'trees': len(model.estimators_), 'max_depth': model.max_depth,
+         'mb': len(pickle.dumps(model)) / 1e6, 'latency_us': sklearn_latency,
+         'accuracy': float(model.score(X_test, y_test))},
+        evaluate('current (compiled)', CompiledForest.from_sklearn(model), model.max_depth),
+    ]
+
+    order = rank_trees(model, X_train[:5000] if len(X_train) > 5000 else X_train)
+    candidates = []
+    for n_trees in sorted({min(n, len(order)) for n in COMPACT_TREE_COUNTS}, reverse=True):
+        for max_depth in COMPACT_MAX_DEPTHS:
+            engine = CompiledForest.compact(model, trees=order[:n_trees], max_depth=max_depth)
+            candidates.append(evaluate('compact forest', engine, max_depth))
+    if distill:
+        for n_estimators, max_depth in DISTILLED_STUDENTS:
+            student = distill_crop_model(model, X_train, n_estimators, max_depth)
+            candidates.append(evaluate('distilled student', CompiledForest.compact(student), max_depth))
+
+    def fits(candidate):
+        return ((max_mb is None or candidate['mb'] <= max_mb)
+                and (max_latency_us is None or candidate['latency_us'] <= max_latency_us))
+
+    fitting = [c for c in candidates if fits(c)]
+    if fitting:
+        # Most accurate, then smallest, then fastest
+        chosen = max(fitting, key=lambda c: (c['accuracy'], -c['mb'], -c['latency_us']))
+    else:
+        chosen = min(candidates, key=lambda c: (c['mb'], c['latency_us']))
+        print(f"Warning: No compact crop model fits {max_mb} MB / {max_latency_us} µs; using the smallest.")
+
+    budget = ' / '.join(part for part in [f"{max_mb} MB" if max_mb else '', f"{max_latency_us} µs" if max_latency_us else '']
+                        if part) or 'none'
+    print(f"\n--- Crop model compaction (budget: {budget}) ---")
+    print(f"   {'candidate':<20} {'trees':>5} {'depth':>5} {'MB':>8} {'p50 µs':>8} {'accuracy':>9}")
+    for candidate in reference + candidates:
+        mark = '  <- chosen' if candidate is chosen else ('' if candidate in reference or fits(candidate) else '  (over budget)')
+        print(f"   {candidate['name']:<20} {candidate['trees']:>5} {str(candidate['max_depth'] or '-'):>5} "
+              f"{candidate['mb']:>8.3f} {candidate['latency_us']:>8.1f} {candidate['accuracy'] * 100:>8.2f}%{mark}")
+    return chosen, candidates
+
+@metrics.span('models.train.crop')
+def train_crop_model(file_path='Crop_data.csv', data_hash=None):
+    """Trains a crop model on `file_path` without activating it. Returns (model, accuracy) or None.
+
+    With a CROP_MAX_MB / CROP_MAX_LATENCY_US budget the returned model is the
+    compacted CompiledForest chosen by compact_crop_model().
+    """
+    split = crop_training_split(file_path, data_hash)
+    if split is None:
+        return None
+    X_train, X_test, y_train, y_test = split
+    model = _fit_crop_model(X_train, y_train, **crop_hyperparameters(data_hash))
+
+    # Accuracy on the holdout split (also used to validate reloaded models)
+    accuracy = model.score(X_test, y_test)
     print(f"✅ Crop Model trained. Accuracy: {accuracy * 100:.2f}%")
+
+    if CROP_MAX_MB or CROP_MAX_LATENCY_US:
+        chosen, _ = compact_crop_model(model, X_train, X_test, y_test, CROP_MAX_MB, CROP_MAX_LATENCY_US)
+        model, accuracy = chosen['engine'], chosen['accuracy']
+        print(f"✅ Compact Crop Model: {chosen['name']}, {chosen['mb']:.3f} MB, "
+              f"{chosen['latency_us']:.1f} µs, accuracy {accuracy * 100:.2f}%")
+    return model, accuracy
+
+def crop_compaction_report(file_path='Crop_data.csv', max_mb=None, max_latency_us=None):
+    """Trains the full forest and prints its compaction trade-offs (nothing is saved)."""
+    split = crop_training_split(file_path)
+    if split is None:
+        return None
+    X_train, X_test, y_train, y_test = split
+    return compact_crop_model(_fit_crop_model(X_train, y_train), X_train, X_test, y_test, max_mb, max_latency_us)
+
+def load_and_train_crop_model(file_path='Crop_data.csv', data_hash=None):
+    """Loads data, trains the Crop Recommendation Model, and stores it."""
+    trained = train_crop_model(file_path, data_hash)
+    if trained is None:
+        return False
+    # Unsaved model: the version is set by save_crop_model()
+    _install_crop_model(trained[0], version=None, accuracy=trained[1])
+    return True
+
+def save_crop_model(data_hash, artifact_dir=None):
+    """Saves the trained crop model as a versioned artifact."""
+    global CROP_BUNDLE, CROP_MODEL_VERSION
+    bundle = CROP_BUNDLE
+    if bundle is None:
+        raise RuntimeError("Crop model not loaded. Call load_and_train_crop_model() first.")
+
+    # The compiled engine is saved too: its flat arrays are memory-mapped on load
+    payload = {'model': bundle['model'], 'features': CROP_FEATURES, 'engine': bundle['engine'],
+               'accuracy': bundle['accuracy'], 'budget': crop_budget(), 'params': crop_hyperparameters(data_hash)}
+    artifact = model_store.save_artifact(CROP_ARTIFACT_NAME, payload, data_hash, artifact_dir)
+    CROP_BUNDLE = dict(bundle, version=artifact['version'])
+    CROP_MODEL_VERSION = artifact['version']
+    return artifact
+
+@metrics.span('models.load.crop')
+def load_crop_model(data_hash=None, artifact_dir=None, min_accuracy=None):
+    """Loads a saved crop model artifact. Returns False if none matches the data hash
+    (or, with `min_accuracy`, if its holdout accuracy is below it)."""
+    artifact = model_store.load_artifact(CROP_ARTIFACT_NAME, data_hash, artifact_dir)
+    if artifact is None or artifact['features'] != CROP_FEATURES:
+        return False
+    if artifact.get('budget', {'max_mb': None, 'max_latency_us': None}) != crop_budget():
+        print("   Crop artifact was built for a different size/latency budget; retraining.")
+        return False
+    if artifact.get('params', crop_hyperparameters()) != crop_hyperparameters(data_hash):
+        print("   Crop artifact was built with different hyperparameters; retraining.")
+        return False
+    if min_accuracy is not None and (artifact.get('accuracy') or 0.0) < min_accuracy:
+        return False
+
+    _install_crop_model(artifact['model'], artifact['version'], artifact.get('accuracy'), artifact.get('engine'))
+    print(f"✅ Crop Model loaded from artifact (version {CROP_MODEL_VERSION}).")
     return True
 
+def read_crop_model(artifact_dir=None):
+    """A saved crop model as a bundle for rank_crops_batch(bundle=...), without activating it.
+
+    Any size/latency budget is accepted, so a compacted model can be compared with the
+    full one. Returns None if there is no usable artifact.
+    """
+    artifact = model_store.load_artifact(CROP_ARTIFACT_NAME, artifact_dir=artifact_dir)
+    if artifact is None or artifact['features'] != CROP_FEATURES:
+        return None
+    return _crop_bundle(artifact['model'], artifact['version'], artifact.get('accuracy'), artifact.get('engine'))
+
+def load_or_train_crop_model(file_path='Crop_data.csv', artifact_dir=None, force_retrain=False):
+    """Loads the saved crop model, retraining (and re-saving) only when the CSV has changed."""
+    try:
+        data_hash = model_store.file_sha256(file_path)
+    except FileNotFoundError:
+        print(f"Error: Crop data file not found at {file_path}. Did you put the 'Crop_data.csv' in the project folder?")
+        return False
+
+    if not force_retrain and load_crop_model(data_hash, artifact_dir):
+        return True
+
+    if not load_and_train_crop_model(file_path, data_hash):
+        return False
+    save_crop_model(data_hash, artifact_dir)
+    return True
+
+# Alternative (keyword) names accepted for the features in batch input dicts.
+CROP_INPUT_ALIASES = {'temp': 'temperature', 'hum': 'humidity', 'ph': 'pH', 'rain': 'rainfall'}
+
+def _crop_feature_matrix(samples):
+    """Converts a 2-D array, DataFrame or iterable of dicts into a float matrix in CROP_FEATURES order."""
+    if isinstance(samples, pd.DataFrame):
+        frame = samples.rename(columns=CROP_INPUT_ALIASES)[CROP_FEATURES]
+    elif isinstance(samples, np.ndarray) or (isinstance(samples, (list, tuple)) and samples and not isinstance(samples[0], dict)):
+        return np.asarray(samples, dtype=float).reshape(-1, len(CROP_FEATURES))
+    else:
+        records = list(samples)
+        if not records:
+            return np.empty((0, len(CROP_FEATURES)))
+        frame = pd.DataFrame.from_records(records).rename(columns=CROP_INPUT_ALIASES)[CROP_FEATURES]
+    return frame.to_numpy(dtype=float)
+
+def _crop_probabilities(samples, bundle):
+    """Class probabilities for every sample, from the compiled engine or sklearn."""
+    features = _crop_feature_matrix(samples)
+    if not len(features):
+        return np.empty((0, len(bundle['model'].classes_)))
+    engine = bundle['engine']
+    if engine is not None and len(features) <= COMPILED_FOREST_MAX_BATCH:
+        return engine.predict_proba(features)
+    return bundle['model'].predict_proba(pd.DataFrame(features, columns=CROP_FEATURES))
+
+def rank_crops_batch(samples, top_k=CROP_TOP_K, bundle=None):
+    """Ranks the `top_k` most likely crops for every row of `samples` in one forest traversal.
+
+    Accepts the same inputs as recommend_crops_batch(). Returns (labels, confidences)
+    arrays of shape (n_samples, top_k), best first; confidences are percentages.
+    `bundle` scores with another model (see read_crop_model) instead of the active one.
+    """
+    bundle = bundle or CROP_BUNDLE
+    if bundle is None:
+        raise RuntimeError("Crop model not loaded. Call load_and_train_crop_model() first.")
+
+    probabilities = _crop_probabilities(samples, bundle)
+
+    # Stable sort keeps the same tie-breaking as predict() (first class wins)
+    top_k = min(top_k, probabilities.shape[1])
+    order = np.argsort(-probabilities, axis=1, kind='stable')[:, :top_k]
+
+    labels = bundle['model'].classes_[order]
+    confidences = np.take_along_axis(probabilities, order, axis=1) * 100
+    return labels, confidences
+
+def recommend_crops_batch(samples):
+    """Predicts the best crop for every row of `samples` with one vectorized predict_proba call.
+
+    `samples` may be a 2-D array (columns in CROP_FEATURES order), a DataFrame or an
+    iterable of dicts keyed by CROP_FEATURES (or recommend_crop's keyword names).
+    Returns (labels, confidences) as arrays; confidences are percentages.
+    """
+    labels, confidences = rank_crops_batch(samples, top_k=1)
+    return labels[:, 0], confidences[:, 0]
+
+def rank_crops(N, P, K, temp, hum, ph, rain, top_k=CROP_TOP_K):
+    """Returns the `top_k` best crops as a list of (crop, confidence) pairs, best first."""
+    labels, confidences = rank_crops_batch([[N, P, K, temp, hum, ph, rain]], top_k)
+    return list(zip(labels[0], confidences[0]))
+
 def recommend_crop(N, P, K, temp, hum, ph, rain):
     """Predicts and returns the best crop based on input parameters."""
-    if CROP_MODEL is None:
-        raise RuntimeError("Crop model not loaded. Call load_and_train_crop_model() first.")
-    
-    # Ensure input is in the correct format for the model
-    user_input = np.array([[N, P, K, temp, hum, ph, rain]])
-    
-    recommended_crop = CROP_MODEL.predict(user_input)[0]
-    
-    # Get confidence (optional)
-    probabilities = CROP_MODEL.predict_proba(user_input)
-    confidence = probabilities.max() * 100
-    
-    return recommended_crop, confidence
+    labels, confidences = recommend_crops_batch([[N, P, K, temp, hum, ph, rain]])
+    return labels[0], confidences[0]
 
 if __name__ == '__main__':
     # This block is for testing this module independently
@@ -56,4 +374,6 @@ if __name__ == '__main__':
         # Test with example data (adjust these values to see different results!)
         crop, conf = recommend_crop(N=90, P=40, K=40, temp=20.0, hum=80.0, ph=6.0, rain=200.0)
         print(f"\n--- Standalone Crop Test ---")
-        print(f"Recommended Crop: **{crop.upper()}** (Confidence: {conf:.2f}%)")
\ No newline at end of file
+        print(f"Recommended Crop: **{crop.upper()}** (Confidence: {conf:.2f}%)")
+        for alt_crop, alt_conf in rank_crops(N=90, P=40, K=40, temp=20.0, hum=80.0, ph=6.0, rain=200.0)[1:]:
+            print(f"   Alternative: {alt_crop} ({alt_conf:.2f}%)")
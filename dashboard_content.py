@@ -0,0 +1,347 @@
+# dashboard_content.py
+# --------------------------------------------------------------------------------
+# Dashboard content (weather, news headlines, crop growth ratios) per location.
+# A provider fetches each section; ContentCache keeps it per (state, city) with a
+# TTL, serves stale entries while refreshing them in the background, and coalesces
+# concurrent misses so a burst of users in one city makes a single upstream fetch.
+# DashboardContent gathers the sections concurrently, each with its own cache and
+# timeout, and fills in placeholders for the ones that fail.
+# --------------------------------------------------------------------------------
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from urllib.parse import quote
+
+SECTIONS = ('weather', 'news', 'growth')
+# Seconds a page waits for each section before rendering it as unavailable
+DEFAULT_TIMEOUTS = {'weather': 2.0, 'news': 2.0, 'growth': 2.0}
+
+
+# --------------------------------------------------------------------------------
+# Providers
+# --------------------------------------------------------------------------------
+class ContentProvider:
+    """Source of dashboard content. Subclasses implement weather, news and growth."""
+
+    name = 'base'
+
+    def weather(self, city, state):
+        """Returns {'location', 'temp', 'condition', 'details'}."""
+        raise NotImplementedError
+
+    def news(self, city, state):
+        """Returns a list of headline strings."""
+        raise NotImplementedError
+
+    def growth(self, city, state):
+        """Returns a list of {'crop', 'ratio', 'status'} dicts."""
+        raise NotImplementedError
+
+    def fetch(self, city, state):
+        return {
+            'weather': self.weather(city, state),
+            'news': self.news(city, state),
+            'growth': self.growth(city, state),
+        }
+
+
+class SimulatedProvider(ContentProvider):
+    """Local stand-in for real feeds: plausible random content, no network access."""
+
+    name = 'simulated'
+
+    def __init__(self, seed=None, latency=0.0):
+        self._random = random.Random(seed)
+        self.latency = latency  # seconds per section, to mimic three remote feeds
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def weather(self, city, state):
+        self._wait()
+        temp = self._random.randint(18, 35)
+        return {
+            "location": f"{city}, {state}",
+            "temp": f"{temp}°C",
+            "condition": self._random.choice(["Clear Sky", "Partly Cloudy", "Hazy", "Chance of Showers"]),
+            "details": f"Humidity: {self._random.randint(50, 90)}%, Wind: {self._random.randint(5, 15)} km/h"
+        }
+
+    def news(self, city, state):
+        self._wait()
+        return [
+            f"Local authorities in {city} warn farmers about water table depletion.",
+            "State government announces new subsidy scheme for fertilizers.",
+            f"Agriculture trends improving across {state} due to early rains."
+        ]
+
+    def growth(self, city, state):
+        self._wait()
+        crops = self._random.sample(['Wheat', 'Rice', 'Sugarcane', 'Cotton', 'Maize', 'Groundnut'], 3)
+        growth = []
+        for crop in crops:
+            ratio_val = round(self._random.uniform(-4.5, 6.5), 1)
+            growth.append({
+                "crop": crop,
+                "ratio": ratio_val,
+                "status": "up" if ratio_val >= 0 else "down"
+            })
+        return growth
+
+
+class HttpJsonProvider(ContentProvider):
+    """Fetches each section as JSON from a URL template formatted with {city} and {state}.
+
+    Connections are pooled and kept alive across fetches (requires `requests`).
+    """
+
+    name = 'http'
+
+    def __init__(self, weather_url, news_url, growth_url, timeout=5.0, pool_size=10, headers=None):
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+        except ImportError:
+            raise RuntimeError("The HTTP dashboard provider requires requests (pip install requests).")
+        self.urls = {'weather': weather_url, 'news': news_url, 'growth': growth_url}
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _get(self, section, city, state):
+        url = self.urls[section].format(city=quote(city), state=quote(state))
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def weather(self, city, state):
+        return self._get('weather', city, state)
+
+    def news(self, city, state):
+        return self._get('news', city, state)
+
+    def growth(self, city, state):
+        return self._get('growth', city, state)
+
+
+PROVIDERS = {provider.name: provider for provider in (SimulatedProvider, HttpJsonProvider)}
+
+
+def create_provider(name='simulated', **options):
+    """Builds a provider by name (see PROVIDERS)."""
+    try:
+        return PROVIDERS[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown dashboard provider '{name}'; choose from {sorted(PROVIDERS)}.")
+
+
+# --------------------------------------------------------------------------------
+# Cache
+# --------------------------------------------------------------------------------
+MISS = object()  # ContentCache.get(..., block=False) on a miss
+
+
+class ContentCache:
+    """Per-location TTL cache with stale-while-revalidate and request coalescing.
+
+    Entries younger than `ttl` are served as is. Entries up to `stale_ttl` old are
+    served immediately while one background refresh runs. Older entries, and
+    misses, are fetched in the foreground; concurrent callers for the same key
+    wait on that single fetch. A failed refresh keeps serving the stale entry.
+    """
+
+    def __init__(self, fetch, ttl=600, stale_ttl=3600, maxsize=1024, refresh_workers=4):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.refresh_workers = refresh_workers
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.errors = 0
+        self._entries = OrderedDict()  # key -> (fetched_at, value)
+        self._in_flight = {}           # key -> Future of the running fetch
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _refresh_executor(self):
+        # Threads don't survive fork(): each (gunicorn) worker gets its own pool
+        if self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.refresh_workers, thread_name_prefix='dashboard-refresh')
+            self._in_flight = {}
+            self._pid = os.getpid()
+        return self._executor
+
+    def get(self, *key, block=True):
+        """The cached value for `key`, fetching it on a miss (or returning MISS if not `block`)."""
+        now = time.monotonic()
+        with self._lock:
+            executor = self._refresh_executor()
+            entry = self._entries.get(key)
+            age = now - entry[0] if entry else None
+            if entry and age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+
+            future = self._in_flight.get(key)
+            if entry and age < self.stale_ttl:
+                self.stale_hits += 1
+                if future is None:
+                    self._in_flight[key] = executor.submit(self._fetch, key)
+                return entry[1]
+
+            if not block:
+                return MISS
+            self.misses += 1
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if leader:
+            try:
+                future.set_result(self._fetch(key))
+            except Exception as e:
+                future.set_exception(e)
+        return future.result()
+
+    def _fetch(self, key):
+        try:
+            value = self.fetch(*key)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+                self._in_flight.pop(key, None)
+                stale = self._entries.get(key)
+            if stale is None:
+                raise
+            return stale[1]
+
+        with self._lock:
+            self.fetches += 1
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._in_flight.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries), 'maxsize': self.maxsize, 'ttl': self.ttl, 'stale_ttl': self.stale_ttl,
+                'hits': self.hits, 'stale_hits': self.stale_hits, 'misses': self.misses,
+                'fetches': self.fetches, 'errors': self.errors, 'refreshing': len(self._in_flight),
+            }
+
+
+def unavailable_content(section, city, state):
+    """Placeholder shown for a section that failed or timed out."""
+    if section == 'weather':
+        return {'location': f"{city}, {state}", 'temp': '--', 'condition': 'Unavailable', 'details': ''}
+    return []
+
+
+class DashboardContent:
+    """Cached dashboard content for one provider, gathered section by section.
+
+    Each section has its own cache, so one failing feed never blanks or expires the
+    others. With `concurrent`, sections that are not cached are fetched at the same
+    time on a thread pool, so a page waits for the slowest feed rather than for all
+    of them in turn. A section still missing after its timeout (or whose fetch
+    failed) is rendered as a placeholder; a timed-out fetch carries on in the
+    background and fills the cache for the next request. Without `concurrent` the
+    sections are fetched one after another in the calling thread, with no timeout.
+    """
+
+    def __init__(self, provider, ttl=600, stale_ttl=3600, maxsize=1024, concurrent=True, timeouts=None,
+                 gather_workers=16):
+        self.provider = provider
+        self.concurrent = concurrent
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.gather_workers = gather_workers
+        self.unavailable = {}  # (section, 'timeout' | 'error') -> count
+        # Keyed (state, city) so one state's entries sit together in the LRU order
+        self.caches = {section: ContentCache(self._section_fetch(section), ttl, stale_ttl, maxsize)
+                       for section in SECTIONS}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _section_fetch(self, section):
+        fetch = getattr(self.provider, section)
+        return lambda state, city: fetch(city, state)
+
+    def _gather_executor(self):
+        # Threads don't survive fork(): each (gunicorn) worker gets its own pool
+        with self._lock:
+            if self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.gather_workers, thread_name_prefix='dashboard-gather')
+                self._pid = os.getpid()
+            return self._executor
+
+    def get(self, city, state):
+        """{'weather', 'news', 'growth', 'unavailable': [placeholder sections]}; never raises."""
+        started = time.monotonic()
+        content, pending = {}, {}
+        for section, cache in self.caches.items():
+            # Cached sections are answered in this thread; only misses go to the pool
+            value = cache.get(state, city, block=False) if self.concurrent else MISS
+            if value is not MISS:
+                content[section] = value
+            elif self.concurrent:
+                pending[section] = self._gather_executor().submit(cache.get, state, city)
+
+        unavailable = []
+        for section in SECTIONS:
+            if section in content:
+                continue
+            try:
+                if section in pending:
+                    timeout = max(self.timeouts[section] - (time.monotonic() - started), 0)
+                    content[section] = pending[section].result(timeout)
+                else:
+                    content[section] = self.caches[section].get(state, city)
+                continue
+            except FutureTimeoutError:
+                reason = 'timeout'
+                print(f"Warning: Dashboard {section} for {city}, {state} timed out after {self.timeouts[section]}s.")
+            except Exception as e:
+                reason = 'error'
+                print(f"Warning: Dashboard {section} for {city}, {state} unavailable: {e}")
+            content[section] = unavailable_content(section, city, state)
+            unavailable.append(section)
+            with self._lock:
+                self.unavailable[section, reason] = self.unavailable.get((section, reason), 0) + 1
+
+        content['unavailable'] = unavailable
+        return content
+
+    def clear(self):
+        for cache in self.caches.values():
+            cache.clear()
+
+    def stats(self):
+        """Section cache counters summed, per-section stats, and placeholder counts."""
+        sections = {section: cache.stats() for section, cache in self.caches.items()}
+        totals = {name: sum(stats[name] for stats in sections.values())
+                  for name in ('size', 'hits', 'stale_hits', 'misses', 'fetches', 'errors', 'refreshing')}
+        with self._lock:
+            unavailable = dict(self.unavailable)
+        return dict(totals, sections=sections, unavailable=unavailable)
@@ -0,0 +1,110 @@
+# data_ingestion.py
+# --------------------------------------------------------------------------------
+# Typed loading of the training CSVs for both recommenders.
+# Columns are read with explicit compact dtypes (float32 numbers, categorical labels)
+# and the parsed frame is cached as Parquet next to the model artifacts, keyed by the
+# CSV's SHA-256, so later loads of unchanged data skip CSV parsing entirely. The
+# cache needs pyarrow; without it every load parses the CSV.
+# --------------------------------------------------------------------------------
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+import model_store
+from soil_types import DEFAULT_SOIL_TYPE, SOIL_CODES, soil_code
+
+CROP_DTYPES = {
+    'N': 'float32', 'P': 'float32', 'K': 'float32', 'temperature': 'float32',
+    'humidity': 'float32', 'pH': 'float32', 'rainfall': 'float32', 'label': 'category',
+}
+FERTILIZER_DTYPES = {
+    'Temp': 'float32', 'Humidity': 'float32', 'Soil Moisture': 'float32', 'Soil Type': 'category',
+    'Crop Type': 'category', 'N': 'float32', 'K': 'float32', 'P': 'float32',
+    'Fertilizer Name': 'category', 'pH': 'float32',
+}
+
+DATA_CACHE_DIR = os.environ.get('AGRI_AI_DATA_CACHE_DIR', os.path.join(model_store.ARTIFACT_DIR, 'data'))
+# Bump when the dtypes above change so older cache files are not reused
+DATA_CACHE_FORMAT_VERSION = 1
+USE_DATA_CACHE = os.environ.get('AGRI_AI_DATA_CACHE', '1') == '1'
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _cache_path(file_path, data_hash, cache_dir):
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f"{stem}-v{DATA_CACHE_FORMAT_VERSION}-{data_hash[:16]}.parquet")
+
+
+def read_typed_csv(file_path, dtypes, data_hash=None, cache_dir=None, use_cache=None):
+    """Reads the `dtypes` columns of a CSV with those dtypes, via the Parquet cache when possible.
+
+    Raises FileNotFoundError if the CSV is missing.
+    """
+    use_cache = USE_DATA_CACHE if use_cache is None else use_cache
+    if not use_cache or not _parquet_available():
+        return pd.read_csv(file_path, usecols=list(dtypes), dtype=dtypes)
+
+    cache_dir = cache_dir or DATA_CACHE_DIR
+    path = _cache_path(file_path, data_hash or model_store.file_sha256(file_path), cache_dir)
+    if os.path.exists(path):
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:
+            print(f"Warning: Could not read data cache {path}: {e}; parsing the CSV.")
+
+    data = pd.read_csv(file_path, usecols=list(dtypes), dtype=dtypes)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temp file first so a crashed write never leaves a half-written cache
+        tmp_path = model_store.temp_path(path)
+        try:
+            data.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        # Drop caches of earlier versions of the same CSV
+        for stale in glob.glob(_cache_path(file_path, '*', cache_dir)):
+            if stale != path:
+                os.remove(stale)
+    except OSError as e:
+        print(f"Warning: Could not write data cache {path}: {e}")
+    return data
+
+
+def load_crop_data(file_path='Crop_data.csv', data_hash=None):
+    """Crop_data.csv as a typed DataFrame (float32 features, categorical label)."""
+    return read_typed_csv(file_path, CROP_DTYPES, data_hash)
+
+
+def load_fertilizer_data(file_path='Fertilizer_data.csv', data_hash=None):
+    """Fertilizer_data.csv as a typed DataFrame (float32 numbers, categorical soil/crop/fertilizer)."""
+    return read_typed_csv(file_path, FERTILIZER_DTYPES, data_hash)
+
+
+def encode_soil(values):
+    """Soil codes (float32) for a sequence of soil type labels, plus the sorted unknown labels.
+
+    Labels are looked up once per distinct value, not per row. Unknown labels get
+    DEFAULT_SOIL_TYPE's code.
+    """
+    categorical = values.array if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype) \
+        else pd.Categorical(values)
+    table = [soil_code(category) for category in categorical.categories]
+    unknown = sorted(str(category) for category, code in zip(categorical.categories, table) if code is None)
+    default = SOIL_CODES[DEFAULT_SOIL_TYPE]
+    # One extra slot at the end for missing values (category code -1)
+    lookup = np.array([default if code is None else code for code in table] + [default], dtype=np.float32)
+    codes = lookup[categorical.codes]
+    if (categorical.codes == -1).any():
+        unknown.append('<missing>')
+    return codes, unknown
@@ -0,0 +1,126 @@
+# database.py
+# --------------------------------------------------------------------------------
+# Database engine settings and the authenticated-user cache.
+# SQLite (the default) runs in WAL mode with a busy timeout so readers never block
+# on the writer; any other SQLAlchemy URL (e.g. postgresql://...) gets a connection
+# pool with pre-ping. Logged-in users are cached in-process for a short TTL so
+# authenticated requests don't each need a database round trip.
+# --------------------------------------------------------------------------------
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import metrics
+
+DEFAULT_DATABASE_URL = 'sqlite:///users.db'
+
+# PRAGMAs applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('AGRI_AI_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': 'NORMAL',  # safe with WAL; fsyncs at checkpoints instead of every commit
+    'busy_timeout': int(os.environ.get('AGRI_AI_SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'foreign_keys': 'ON',
+}
+
+
+def database_url():
+    """The configured database URL (AGRI_AI_DATABASE_URL or DATABASE_URL), SQLite by default."""
+    url = os.environ.get('AGRI_AI_DATABASE_URL') or os.environ.get('DATABASE_URL') or DEFAULT_DATABASE_URL
+    # Hosting providers often still hand out the scheme SQLAlchemy 1.4+ no longer accepts
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, pool_size=None, max_overflow=None, pool_recycle=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for `url`."""
+    options = {'pool_pre_ping': True}
+    if url.startswith('sqlite'):
+        # Let SQLite itself wait on locks for busy_timeout (seconds here, ms in the PRAGMA)
+        options['connect_args'] = {'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000.0}
+        return options
+
+    options.update(
+        pool_size=pool_size or int(os.environ.get('AGRI_AI_DB_POOL_SIZE', 5)),
+        max_overflow=max_overflow if max_overflow is not None else int(os.environ.get('AGRI_AI_DB_MAX_OVERFLOW', 10)),
+        # Recycle before typical server/proxy idle timeouts drop the connection
+        pool_recycle=pool_recycle or int(os.environ.get('AGRI_AI_DB_POOL_RECYCLE', 1800)),
+    )
+    return options
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, _connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(_conn, _cursor, _statement, _parameters, context, _executemany):
+    context._agri_ai_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_query_time(_conn, _cursor, statement, _parameters, context, _executemany):
+    start = getattr(context, '_agri_ai_query_start', None)
+    if start is not None:
+        # Labelled by statement type (SELECT, INSERT, ...) to keep the series count small
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+        metrics.DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation=operation)
+
+
+class UserCache:
+    """Small TTL + LRU cache of detached User rows keyed by id, for Flask-Login's user_loader.
+
+    Entries are dropped when the user row changes in this process; other worker
+    processes see the change once their entry's TTL runs out.
+    """
+
+    def __init__(self, maxsize=10_000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # user id -> (expires_at, user)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, user):
+        if self.maxsize <= 0 or not self.ttl:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,238 @@
+# district_recommendations.py
+# --------------------------------------------------------------------------------
+# Precomputed crop and fertilizer recommendations per district.
+# Every district maps to a soil/climate profile (DEFAULT_PROFILE unless overridden
+# in DISTRICT_PROFILES_PATH; the dashboard only shows districts with an override,
+# since the default profile says nothing about the district itself). For each distinct profile a grid of values around its
+# typical conditions is scored once with the batch models and stored as a compact
+# array table, so the dashboard's "recommended for your district" and recommender
+# inputs that fall on the grid are answered by an index lookup. Tables are tied to
+# the model versions they were built with and rebuilt in the background whenever a
+# model changes.
+# --------------------------------------------------------------------------------
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import crop_recommender
+import fertilizer_recommender
+from location_data import LOCATION_DATA
+from soil_types import SOIL_TYPES, canonical_soil_type
+
+# Numeric inputs of a profile, in crop model order
+GRID_FIELDS = ['N', 'P', 'K', 'temp', 'hum', 'ph', 'rain']
+
+# Typical conditions used for every district without an override, and the grid
+# spacing around them (GRID_LEVELS values per field, centred on the typical value).
+DEFAULT_PROFILE = {'N': 50, 'P': 50, 'K': 50, 'temp': 25, 'hum': 70, 'ph': 6.5, 'rain': 100, 'soil_type': 'Loamy'}
+GRID_STEPS = {'N': 25, 'P': 20, 'K': 20, 'temp': 5, 'hum': 10, 'ph': 0.5, 'rain': 50}
+GRID_LEVELS = 3
+
+# Optional JSON overrides: {"<state>": {...}, "<state>/<district>": {...}}, each a
+# partial profile (district entries win over state entries).
+DISTRICT_PROFILES_PATH = os.environ.get('AGRI_AI_DISTRICT_PROFILES', 'district_profiles.json')
+
+# A recommender input is answered from a table only if every field lies within this
+# fraction of a grid step of a grid point; anything else goes to the models.
+SNAP_TOLERANCE = 0.05
+
+
+def load_district_profiles(path=None):
+    """Returns ({(state, district): profile} for every district in LOCATION_DATA, the
+    set of districts whose profile comes from an override rather than DEFAULT_PROFILE)."""
+    overrides = {}
+    path = path or DISTRICT_PROFILES_PATH
+    if path and os.path.exists(path):
+        with open(path) as fh:
+            overrides = json.load(fh)
+
+    profiles, overridden = {}, set()
+    for state, districts in LOCATION_DATA.items():
+        for district in districts:
+            profile = dict(DEFAULT_PROFILE)
+            profile.update(overrides.get(state, {}))
+            profile.update(overrides.get(f"{state}/{district}", {}))
+            profiles[(state, district)] = profile
+            if state in overrides or f"{state}/{district}" in overrides:
+                overridden.add((state, district))
+    return profiles, overridden
+
+
+class RecommendationTable:
+    """Scored grid for one profile: top-k crops for every grid point, fertilizer per soil type."""
+
+    def __init__(self, profile, steps=None, levels=GRID_LEVELS, top_k=crop_recommender.CROP_TOP_K):
+        steps = steps or GRID_STEPS
+        self.profile = profile
+        self.steps = np.array([steps[field] for field in GRID_FIELDS], dtype=float)
+        offsets = np.arange(levels) - (levels - 1) / 2
+        self.axes = [np.maximum(profile[field] + offsets * step, 0.0) for field, step in zip(GRID_FIELDS, self.steps)]
+        self.shape = tuple(len(axis) for axis in self.axes)
+        self.soil_types = list(SOIL_TYPES)
+
+        points = np.stack(np.meshgrid(*self.axes, indexing='ij'), axis=-1).reshape(-1, len(GRID_FIELDS))
+        labels, confidences = crop_recommender.rank_crops_batch(points, top_k)
+        # Crop names are stored once; the table holds small integer codes
+        self.crop_names, codes = np.unique(labels, return_inverse=True)
+        self.crop_codes = codes.reshape(labels.shape).astype(np.uint8)
+        self.crop_confidence = confidences.astype(np.float32)
+
+        # Fertilizer does not depend on rainfall: score the grid without it, once per soil type
+        fert_axes = self.axes[:6]
+        fert_points = np.stack(np.meshgrid(*fert_axes, indexing='ij'), axis=-1).reshape(-1, 6)
+        rows = [list(point) + [soil] for soil in self.soil_types for point in fert_points]
+        fert_labels, _ = fertilizer_recommender.recommend_fertilizers_batch(rows)
+        self.fertilizer_names, fert_codes = np.unique(fert_labels, return_inverse=True)
+        self.fertilizer_codes = fert_codes.reshape(len(self.soil_types), -1).astype(np.uint8)
+
+    def _flat_index(self, values, tolerance):
+        """Index of the grid point matching `values`, or None if any field is off-grid."""
+        index = []
+        for value, axis, step in zip(values, self.axes, self.steps):
+            nearest = int(np.abs(axis - value).argmin())
+            if abs(axis[nearest] - value) > tolerance * step:
+                return None
+            index.append(nearest)
+        return index
+
+    def _result(self, index, soil_type):
+        flat = int(np.ravel_multi_index(index, self.shape))
+        ranked = [
+            (str(self.crop_names[code]), float(conf))
+            for code, conf in zip(self.crop_codes[flat], self.crop_confidence[flat])
+        ]
+        fertilizer = None
+        soil_type = canonical_soil_type(soil_type)
+        if soil_type in self.soil_types:
+            fert_flat = int(np.ravel_multi_index(index[:6], self.shape[:6]))
+            fertilizer = str(self.fertilizer_names[self.fertilizer_codes[self.soil_types.index(soil_type), fert_flat]])
+        return ranked, fertilizer
+
+    def lookup(self, values, soil_type, tolerance=SNAP_TOLERANCE):
+        """Returns (ranked crops, fertilizer) for grid inputs, or None when off-grid."""
+        index = self._flat_index(values, tolerance)
+        return None if index is None else self._result(index, soil_type)
+
+    def typical(self):
+        """Recommendation at the profile's typical conditions (the grid centre)."""
+        return self._result([len(axis) // 2 for axis in self.axes], self.profile['soil_type'])
+
+    @property
+    def nbytes(self):
+        return self.crop_codes.nbytes + self.crop_confidence.nbytes + self.fertilizer_codes.nbytes
+
+
+class DistrictTables:
+    """All per-profile tables plus the district -> table index, rebuilt on model changes."""
+
+    def __init__(self):
+        self.tables = {}          # profile key -> RecommendationTable
+        self.district_index = {}  # (state, district) -> profile key
+        self.profiled = set()     # districts with their own (overridden) profile
+        self.versions = None      # (crop version, fertilizer version) the tables were built with
+        self.built_at = None
+        self.build_seconds = None
+        self._lock = threading.Lock()
+        self._rebuild_requested = threading.Event()
+        self._worker_pid = None
+
+    @staticmethod
+    def _model_versions():
+        return crop_recommender.CROP_MODEL_VERSION, fertilizer_recommender.FERTILIZER_MODEL_VERSION
+
+    @property
+    def ready(self):
+        # Tables built for older models are never used
+        return self.versions is not None and self.versions == self._model_versions()
+
+    def rebuild(self):
+        """Scores every profile's grid with the active models (runs synchronously)."""
+        if crop_recommender.CROP_BUNDLE is None or fertilizer_recommender.FERTILIZER_BUNDLE is None:
+            return False
+        with self._lock:
+            start = time.perf_counter()
+            versions = self._model_versions()
+            profiles, profiled = load_district_profiles()
+            tables, index = {}, {}
+            for district, profile in profiles.items():
+                key = json.dumps(profile, sort_keys=True)
+                if key not in tables:
+                    tables[key] = RecommendationTable(profile)
+                index[district] = key
+            if versions != self._model_versions():
+                return False  # a model changed mid-build; the listener queues another rebuild
+
+            self.tables, self.district_index, self.profiled, self.versions = tables, index, profiled, versions
+            self.built_at = time.time()
+            self.build_seconds = round(time.perf_counter() - start, 3)
+        print(f"✅ District recommendation tables built: {len(index)} districts, {len(tables)} profile(s), "
+              f"{sum(t.nbytes for t in tables.values()) / 1024:.0f} kB in {self.build_seconds}s")
+        return True
+
+    def _after_fork_in_child(self):
+        # A fork while another thread was building would leave the lock held for good
+        self._lock = threading.Lock()
+
+    def request_rebuild(self, *_):
+        """Rebuilds in a background thread.
+
+        Registered as a model-change listener by whoever does the initial build, so that
+        loading the models doesn't also queue a background build.
+        """
+        self._rebuild_requested.set()
+        # Threads don't survive fork(): start one per process
+        if self._worker_pid != os.getpid():
+            self._worker_pid = os.getpid()
+            threading.Thread(target=self._rebuild_worker, name='district-tables', daemon=True).start()
+
+    def _rebuild_worker(self):
+        while True:
+            self._rebuild_requested.wait()
+            # Both models usually change together; let the second swap land first
+            time.sleep(0.5)
+            self._rebuild_requested.clear()
+            try:
+                self.rebuild()
+            except Exception as e:
+                print(f"Warning: District recommendation table rebuild failed: {e}")
+
+    def for_district(self, state, district):
+        """Typical-conditions recommendation for a district, or None if unavailable.
+
+        Districts on DEFAULT_PROFILE get None: every one of them would show the same crops.
+        """
+        key = self.district_index.get((state, district))
+        if key is None or (state, district) not in self.profiled or not self.ready:
+            return None
+        crops, fertilizer = self.tables[key].typical()
+        return {'profile': self.tables[key].profile, 'crops': crops, 'fertilizer': fertilizer}
+
+    def lookup(self, N, P, K, temp, hum, ph, rain, soil_type):
+        """Answers recommender inputs that sit on any profile's grid; None otherwise."""
+        if not self.ready:
+            return None
+        values = (N, P, K, temp, hum, ph, rain)
+        for table in list(self.tables.values()):
+            result = table.lookup(values, soil_type)
+            if result is not None and result[1] is not None:
+                return result
+        return None
+
+    def stats(self):
+        return {
+            'ready': self.ready,
+            'versions': self.versions,
+            'districts': len(self.district_index),
+            'profiled_districts': len(self.profiled),
+            'profiles': len(self.tables),
+            'bytes': sum(t.nbytes for t in self.tables.values()),
+            'build_seconds': self.build_seconds,
+        }
+
+
+DISTRICT_TABLES = DistrictTables()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=DISTRICT_TABLES._after_fork_in_child)
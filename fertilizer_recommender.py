@@ -2,90 +2,263 @@
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.neighbors import KNeighborsClassifier
-from sklearn.preprocessing import LabelEncoder
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import LabelEncoder, StandardScaler
 import numpy as np
+import os
+
+import data_ingestion
+import hyperparameter_sweep
+import metrics
+import model_store
+from soil_types import DEFAULT_SOIL_TYPE, SOIL_CODES
 
 FERTILIZER_MODEL = None
 # Defining the features list for clarity, using the expected CSV names
 FERTILIZER_FEATURES = ['N', 'P', 'K', 'Temp', 'Humidity', 'pH', 'soil_encoded'] 
 CROP_ENCODER = None 
+FERTILIZER_MODEL_VERSION = None
+FERTILIZER_MODEL_ACCURACY = None # Holdout accuracy measured when the model was trained
+FERTILIZER_ARTIFACT_NAME = 'fertilizer_model'
 
-def load_and_train_fertilizer_model(file_path='Fertilizer_data.csv'):
-    """Loads data, cleans it, trains the Fertilizer Recommendation Model, and stores it."""
-    global FERTILIZER_MODEL, CROP_ENCODER
+# The active model, label encoder and version as one dict. Predictions read it once per
+# call and a reload replaces it with a single assignment, so swapping models is atomic.
+FERTILIZER_BUNDLE = None
 
-    print("\n--- Loading and Training Fertilizer Model ---")
+# Soil types are mapped to numerical values, at train and predict time alike
+# (the full vocabulary and its aliases live in soil_types.py).
+SOIL_MAPPING = SOIL_CODES
+
+# Nearest-neighbour index settings. Features are standardized first so no single
+# column (e.g. N vs pH) dominates the distance; the index type is explicit rather
+# than whatever sklearn's 'auto' picks. Valid algorithms: 'kd_tree', 'ball_tree', 'brute'.
+FERTILIZER_NEIGHBORS = 5
+FERTILIZER_INDEX_ALGORITHM = os.environ.get('AGRI_AI_FERT_INDEX', 'kd_tree')
+FERTILIZER_LEAF_SIZE = int(os.environ.get('AGRI_AI_FERT_LEAF_SIZE', 30))
+
+def build_fertilizer_model(n_neighbors=None, algorithm=None, leaf_size=None):
+    """Returns an unfitted standardize + KNN-index pipeline using the configured settings."""
+    return Pipeline([
+        ('scaler', StandardScaler()),
+        ('knn', KNeighborsClassifier(
+            n_neighbors=n_neighbors or FERTILIZER_NEIGHBORS,
+            algorithm=algorithm or FERTILIZER_INDEX_ALGORITHM,
+            leaf_size=leaf_size or FERTILIZER_LEAF_SIZE,
+        )),
+    ])
+
+def fertilizer_index_config(data_hash=None):
+    """The index settings a saved model must have been built with to be reused.
+
+    n_neighbors comes from the best sweep result for the data with AGRI_AI_USE_SWEEP_PARAMS=1.
+    """
+    tuned = hyperparameter_sweep.tuned_params('fertilizer', data_hash)
+    return {
+        'n_neighbors': tuned.get('n_neighbors', FERTILIZER_NEIGHBORS),
+        'algorithm': FERTILIZER_INDEX_ALGORITHM,
+        'leaf_size': FERTILIZER_LEAF_SIZE,
+    }
+
+def _install_fertilizer_model(model, encoder, version, accuracy):
+    """Makes `model` (with its label encoder) the active fertilizer model."""
+    global FERTILIZER_BUNDLE, FERTILIZER_MODEL, CROP_ENCODER, FERTILIZER_MODEL_VERSION, FERTILIZER_MODEL_ACCURACY
+    FERTILIZER_BUNDLE = {'model': model, 'encoder': encoder, 'version': version, 'accuracy': accuracy}
+    FERTILIZER_MODEL, CROP_ENCODER, FERTILIZER_MODEL_VERSION, FERTILIZER_MODEL_ACCURACY = model, encoder, version, accuracy
+    model_store.notify_model_changed(FERTILIZER_ARTIFACT_NAME)
+
+# CSV columns the features are built from, in FERTILIZER_FEATURES order, and the label column
+FERTILIZER_SOURCE_COLUMNS = ['N', 'P', 'K', 'Temp', 'Humidity', 'pH', 'Soil Type']
+FERTILIZER_LABEL_COLUMN = 'Fertilizer Name'
+
+def fertilizer_training_split(file_path='Fertilizer_data.csv', data_hash=None):
+    """Reads and cleans the fertilizer data.
+
+    Returns (X_train, X_test, y_train, y_test, encoder), or None if the data file is missing.
+    """
     try:
-        data = pd.read_csv(file_path)
+        # Typed columns (float32, categorical labels), from the Parquet cache when unchanged
+        data = data_ingestion.load_fertilizer_data(file_path, data_hash)
     except FileNotFoundError:
         print(f"Error: Fertilizer data file not found at {file_path}. The soil nutrients are crying out for data!")
-        return False
+        return None
     
-    # 1. INITIAL DATA CLEANING: Drop any rows that had missing values in the CSV.
+    # 1. INITIAL DATA CLEANING: Drop any rows with missing values in the columns we use
+    # (a missing label would otherwise be trained as the class 'nan').
     initial_rows = len(data)
-    data.dropna(inplace=True) 
+    data = data.dropna(subset=FERTILIZER_SOURCE_COLUMNS + [FERTILIZER_LABEL_COLUMN])
     print(f"   Cleaned fertilizer data: Dropped {initial_rows - len(data)} row(s) initially with missing data.")
     
-    # 2. FEATURE ENGINEERING: Map soil types to numerical values.
+    # 2. FEATURE ENGINEERING: Map soil types to numerical values (one lookup per distinct label).
     # Note: Column names MUST be exact for 'Soil Type' and 'Fertilizer Name'
-    soil_mapping = {
-        'Sandy': 0, 'Loamy': 1, 'Black': 2, 'Red': 3, 'Clayey': 4, 'Alluvial': 5
-    }
-    
-    data['soil_encoded'] = data['Soil Type'].map(soil_mapping)
+    soil_encoded, unknown = data_ingestion.encode_soil(data['Soil Type'])
     
-    # 3. SECONDARY DATA CLEANING: Handle unrecognized soil types.
-    # If a soil type in the CSV isn't in the map, it results in NaN, which fails the model.
-    rows_imputed = data['soil_encoded'].isna().sum()
-    data['soil_encoded'].fillna(1, inplace=True) # Fill unrecognized (NaN) with 'Loamy' (1)
-    print(f"   Cleaned soil encoding: Imputed {rows_imputed} row(s) with unrecognized soil types to 'Loamy' (1).")
+    # 3. SECONDARY DATA CLEANING: Handle unrecognized soil types (imputed to DEFAULT_SOIL_TYPE).
+    if unknown:
+        rows_imputed = int((~data['Soil Type'].astype(str).isin(SOIL_MAPPING)).sum())
+        print(f"   Cleaned soil encoding: Imputed {rows_imputed} row(s) with unrecognized soil types {unknown} "
+              f"to '{DEFAULT_SOIL_TYPE}'.")
 
     # 4. TARGET ENCODING
-    CROP_ENCODER = LabelEncoder()
-    data['fertilizer_encoded'] = CROP_ENCODER.fit_transform(data['Fertilizer Name'])
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(data[FERTILIZER_LABEL_COLUMN].astype(str))
     
     # 5. SPLIT AND TRAIN
     # X and y selection using the cleaned data
-    X = data[['N', 'P', 'K', 'Temp', 'Humidity', 'pH', 'soil_encoded']] 
-    y = data['fertilizer_encoded']
+    X = data[FERTILIZER_SOURCE_COLUMNS[:-1]].assign(soil_encoded=soil_encoded)
+    X.columns = FERTILIZER_FEATURES
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, shuffle=True, random_state=42
     )
+    return X_train, X_test, y_train, y_test, encoder
+
+@metrics.span('models.train.fertilizer')
+def train_fertilizer_model(file_path='Fertilizer_data.csv', data_hash=None):
+    """Cleans the data and trains a fertilizer model without activating it.
+
+    Returns (model, encoder, accuracy), or None if the data file is missing.
+    """
+    print("\n--- Loading and Training Fertilizer Model ---")
+    split = fertilizer_training_split(file_path, data_hash)
+    if split is None:
+        return None
+    X_train, X_test, y_train, y_test, encoder = split
+
+    config = fertilizer_index_config(data_hash)
+    model = build_fertilizer_model(config['n_neighbors'], config['algorithm'], config['leaf_size'])
+    model.fit(X_train, y_train) 
     
-    FERTILIZER_MODEL = KNeighborsClassifier(n_neighbors=5)
-    FERTILIZER_MODEL.fit(X_train, y_train) 
-    
-    # 6. EVALUATION
-    accuracy = FERTILIZER_MODEL.score(X_test, y_test)
+    # 6. EVALUATION (also used to validate reloaded models)
+    accuracy = model.score(X_test, y_test)
     print(f"✅ Fertilizer Model trained. Accuracy: {accuracy * 100:.2f}%")
+    return model, encoder, accuracy
+
+def load_and_train_fertilizer_model(file_path='Fertilizer_data.csv', data_hash=None):
+    """Loads data, cleans it, trains the Fertilizer Recommendation Model, and stores it."""
+    trained = train_fertilizer_model(file_path, data_hash)
+    if trained is None:
+        return False
+    # Unsaved model: the version is set by save_fertilizer_model()
+    _install_fertilizer_model(trained[0], trained[1], version=None, accuracy=trained[2])
     return True
 
-def recommend_fertilizer(N, P, K, temp, humidity, ph, soil_type):
-    """Predicts and returns the best fertilizer based on crop and soil inputs."""
-    if FERTILIZER_MODEL is None:
-        # This shouldn't happen if load_and_train_fertilizer_model ran successfully
+def save_fertilizer_model(data_hash, artifact_dir=None):
+    """Saves the trained fertilizer model, label encoder and soil mapping as a versioned artifact."""
+    global FERTILIZER_BUNDLE, FERTILIZER_MODEL_VERSION
+    bundle = FERTILIZER_BUNDLE
+    if bundle is None:
         raise RuntimeError("Fertilizer model not loaded. Call load_and_train_fertilizer_model() first.")
 
-    # Get the mapping again for prediction
-    soil_mapping = {
-        'Sandy': 0, 'Loamy': 1, 'Black': 2, 'Red': 3, 'Clayey': 4, 'Alluvial': 5
+    payload = {
+        'model': bundle['model'],
+        'encoder': bundle['encoder'],
+        'accuracy': bundle['accuracy'],
+        'features': FERTILIZER_FEATURES,
+        'soil_mapping': SOIL_MAPPING,
+        'index_config': fertilizer_index_config(data_hash),
     }
-    
-    # Use .get() to safely retrieve the encoded value, defaulting to 1 (Loamy) if unknown
-    soil_encoded = soil_mapping.get(soil_type, 1)
-    
-    if soil_encoded == 1 and soil_type not in soil_mapping:
-        print(f"Warning: Unknown soil type '{soil_type}'. Defaulting to 'Loamy' (1) for prediction.")
+    artifact = model_store.save_artifact(FERTILIZER_ARTIFACT_NAME, payload, data_hash, artifact_dir)
+    FERTILIZER_BUNDLE = dict(bundle, version=artifact['version'])
+    FERTILIZER_MODEL_VERSION = artifact['version']
+    return artifact
 
-    # Prepare input for the model. Order MUST match FERTILIZER_FEATURES.
-    user_input = np.array([[N, P, K, temp, humidity, ph, soil_encoded]])
-    
-    # Predict and decode
-    fertilizer_encoded = FERTILIZER_MODEL.predict(user_input)
-    recommended_fertilizer = CROP_ENCODER.inverse_transform(fertilizer_encoded)[0]
-    
-    return recommended_fertilizer
+@metrics.span('models.load.fertilizer')
+def load_fertilizer_model(data_hash=None, artifact_dir=None, min_accuracy=None):
+    """Loads a saved fertilizer model artifact. Returns False if none matches the data hash
+    (or, with `min_accuracy`, if its holdout accuracy is below it)."""
+    artifact = model_store.load_artifact(FERTILIZER_ARTIFACT_NAME, data_hash, artifact_dir)
+    if artifact is None or artifact['features'] != FERTILIZER_FEATURES or artifact['soil_mapping'] != SOIL_MAPPING:
+        return False
+    if artifact.get('index_config') != fertilizer_index_config(data_hash):
+        print("   Fertilizer artifact was built with different index settings; retraining.")
+        return False
+    if min_accuracy is not None and (artifact.get('accuracy') or 0.0) < min_accuracy:
+        return False
+
+    _install_fertilizer_model(artifact['model'], artifact['encoder'], artifact['version'], artifact.get('accuracy'))
+    print(f"✅ Fertilizer Model loaded from artifact (version {FERTILIZER_MODEL_VERSION}).")
+    return True
+
+def read_fertilizer_model(artifact_dir=None):
+    """A saved fertilizer model as a bundle for recommend_fertilizers_batch(bundle=...), without
+    activating it. Any index settings are accepted. Returns None if there is no usable artifact."""
+    artifact = model_store.load_artifact(FERTILIZER_ARTIFACT_NAME, artifact_dir=artifact_dir)
+    if artifact is None or artifact['features'] != FERTILIZER_FEATURES or artifact['soil_mapping'] != SOIL_MAPPING:
+        return None
+    return {'model': artifact['model'], 'encoder': artifact['encoder'], 'version': artifact['version'],
+            'accuracy': artifact.get('accuracy')}
+
+def load_or_train_fertilizer_model(file_path='Fertilizer_data.csv', artifact_dir=None, force_retrain=False):
+    """Loads the saved fertilizer model, retraining (and re-saving) only when the CSV has changed."""
+    try:
+        data_hash = model_store.file_sha256(file_path)
+    except FileNotFoundError:
+        print(f"Error: Fertilizer data file not found at {file_path}. The soil nutrients are crying out for data!")
+        return False
+
+    if not force_retrain and load_fertilizer_model(data_hash, artifact_dir):
+        return True
+
+    if not load_and_train_fertilizer_model(file_path, data_hash):
+        return False
+    save_fertilizer_model(data_hash, artifact_dir)
+    return True
+
+# Batch input columns, in the same order as recommend_fertilizer's arguments.
+FERTILIZER_INPUT_COLUMNS = ['N', 'P', 'K', 'temp', 'humidity', 'ph', 'soil_type']
+# Maps the CSV column names onto the batch input names.
+FERTILIZER_INPUT_ALIASES = {'Temp': 'temp', 'Humidity': 'humidity', 'pH': 'ph', 'Soil Type': 'soil_type'}
+
+def _fertilizer_feature_frame(samples):
+    """Converts a 2-D array, DataFrame or iterable of dicts into a feature frame in FERTILIZER_FEATURES order."""
+    if isinstance(samples, pd.DataFrame):
+        frame = samples.rename(columns=FERTILIZER_INPUT_ALIASES)
+    elif isinstance(samples, np.ndarray) or (isinstance(samples, (list, tuple)) and samples and not isinstance(samples[0], dict)):
+        frame = pd.DataFrame(np.asarray(samples, dtype=object).reshape(-1, len(FERTILIZER_INPUT_COLUMNS)),
+                             columns=FERTILIZER_INPUT_COLUMNS)
+    else:
+        records = list(samples)
+        frame = (pd.DataFrame.from_records(records).rename(columns=FERTILIZER_INPUT_ALIASES) if records
+                 else pd.DataFrame(columns=FERTILIZER_INPUT_COLUMNS))
+
+    # Encode soil types (any known spelling), defaulting to DEFAULT_SOIL_TYPE for unknown ones
+    soil_encoded, unknown = data_ingestion.encode_soil(frame['soil_type'])
+    if unknown:
+        print(f"Warning: Unknown soil type(s) {unknown}. Defaulting to '{DEFAULT_SOIL_TYPE}' for prediction.")
+
+    features = frame[['N', 'P', 'K', 'temp', 'humidity', 'ph']].astype(np.float32)
+    features.columns = FERTILIZER_FEATURES[:-1]
+    features['soil_encoded'] = soil_encoded
+    return features
+
+def recommend_fertilizers_batch(samples, bundle=None):
+    """Predicts the best fertilizer for every row of `samples` with one vectorized predict_proba call.
+
+    `samples` may be a 2-D array (columns in FERTILIZER_INPUT_COLUMNS order), a DataFrame
+    or an iterable of dicts keyed by FERTILIZER_INPUT_COLUMNS (or the CSV column names).
+    Returns (labels, confidences) as arrays; confidences are percentages. `bundle`
+    scores with another model (see read_fertilizer_model) instead of the active one.
+    """
+    bundle = bundle or FERTILIZER_BUNDLE
+    if bundle is None:
+        # This shouldn't happen if load_and_train_fertilizer_model ran successfully
+        raise RuntimeError("Fertilizer model not loaded. Call load_and_train_fertilizer_model() first.")
+
+    features = _fertilizer_feature_frame(samples)
+    if features.empty:
+        return bundle['encoder'].classes_[:0], np.empty(0)
+    probabilities = bundle['model'].predict_proba(features)
+    best = probabilities.argmax(axis=1)
+
+    # Decode
+    labels = bundle['encoder'].inverse_transform(bundle['model'].classes_[best])
+    confidences = probabilities[np.arange(len(best)), best] * 100
+    return labels, confidences
+
+def recommend_fertilizer(N, P, K, temp, humidity, ph, soil_type):
+    """Predicts and returns the best fertilizer based on crop and soil inputs."""
+    labels, _ = recommend_fertilizers_batch([[N, P, K, temp, humidity, ph, soil_type]])
+    return labels[0]
 
 if __name__ == '__main__':
     # This block is for testing this module independently
@@ -0,0 +1,232 @@
+# forest_engine.py
+# --------------------------------------------------------------------------------
+# NumPy-native inference for a fitted RandomForestClassifier.
+# The trees are flattened into contiguous node arrays and all trees are walked
+# together, one level per step, so a request costs a few vectorized gathers
+# instead of sklearn's per-call validation and per-estimator dispatch.
+# CompiledForest.compact() builds a smaller variant for size/latency budgets: a
+# subset of the trees (see rank_trees), optionally cut off at a maximum depth, with
+# leaf distributions stored once per leaf as uint16.
+# --------------------------------------------------------------------------------
+import numpy as np
+
+# sklearn marks leaves with this child index
+_TREE_LEAF = -1
+
+
+def _round_thresholds_down(threshold):
+    """float32 thresholds that split float32 inputs exactly like sklearn's float64 ones."""
+    threshold32 = threshold.astype(np.float32)
+    rounded_up = threshold32 > threshold
+    threshold32[rounded_up] = np.nextafter(threshold32[rounded_up], np.float32(-np.inf))
+    return threshold32
+
+
+def _preorder(tree, max_depth=None):
+    """Node ids reachable within `max_depth` levels, in preorder, and which of them are leaves."""
+    children_left, children_right = tree.children_left, tree.children_right
+    order, is_leaf, stack = [], [], [(0, 0)]
+    while stack:
+        node, depth = stack.pop()
+        leaf = children_left[node] == _TREE_LEAF or (max_depth is not None and depth >= max_depth)
+        order.append(node)
+        is_leaf.append(leaf)
+        if not leaf:
+            stack.append((children_right[node], depth + 1))
+            stack.append((children_left[node], depth + 1))
+    return np.array(order), np.array(is_leaf)
+
+
+class CompiledForest:
+    """Flattened, read-only copy of a fitted RandomForestClassifier."""
+
+    # Compact engines only (see compact()); defaults keep older pickled engines loadable
+    leaf_row = None
+    proba_scale = None
+
+    def __init__(self, classes, roots, feature, threshold, left, delta, leaf_proba, max_depth,
+                 leaf_row=None, proba_scale=None):
+        self.classes_ = classes
+        self.roots = roots            # (n_trees,) index of each tree's root node
+        self.feature = feature        # (n_nodes,) split feature (0 for leaves)
+        self.threshold = threshold    # (n_nodes,) float32 split threshold (+inf for leaves)
+        self.left = left              # (n_nodes,) left child (self for leaves)
+        self.delta = delta            # (n_nodes,) right child - left child (0 for leaves)
+        self.leaf_proba = leaf_proba  # (n_nodes, n_classes) class distribution / n_trees
+        self.max_depth = max_depth
+        # Compact layout: leaf_proba has one row per leaf, found through leaf_row
+        # (n_nodes,), and holds integers that proba_scale turns into probabilities.
+        self.leaf_row = leaf_row
+        self.proba_scale = proba_scale
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Builds the flat node arrays from a fitted RandomForestClassifier."""
+        n_classes = len(model.classes_)
+        n_trees = len(model.estimators_)
+        offsets, feature, threshold, left, right, leaf_proba = [], [], [], [], [], []
+        max_depth, offset = 0, 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == _TREE_LEAF
+
+            offsets.append(offset)
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            # Leaves loop back to themselves and always take the left branch
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            left.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            right.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+            # Same per-tree normalization as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            leaf_proba.append(value / normalizer / n_trees)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += tree.node_count
+
+        # sklearn compares float32 inputs against float64 thresholds. Rounding each
+        # threshold down to the nearest float32 keeps every split decision identical
+        # while letting the comparison run entirely in float32.
+        threshold32 = _round_thresholds_down(np.concatenate(threshold))
+
+        left = np.concatenate(left).astype(np.int32)
+        right = np.concatenate(right).astype(np.int32)
+        return cls(
+            classes=np.asarray(model.classes_),
+            roots=np.asarray(offsets, dtype=np.int32),
+            feature=np.concatenate(feature).astype(np.intp),
+            threshold=threshold32,
+            left=left,
+            delta=right - left,
+            leaf_proba=np.concatenate(leaf_proba),
+            max_depth=max_depth,
+        )
+
+    @classmethod
+    def compact(cls, model, trees=None, max_depth=None, quantize=True):
+        """Builds a compact engine from the `trees` indices of a fitted forest (default: all).
+
+        Trees are cut off at `max_depth` (a cut node predicts the class distribution of
+        the training samples that reached it, like a shallower tree). With `quantize`,
+        leaf probabilities are stored as uint16 (error below 1e-5 per tree).
+        """
+        estimators = [model.estimators_[i] for i in (range(len(model.estimators_)) if trees is None else trees)]
+        n_classes, n_trees = len(model.classes_), len(estimators)
+        offsets, feature, threshold, left, delta, leaf_row, leaf_proba = [], [], [], [], [], [], []
+        depth, offset, leaf_offset = 0, 0, 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            order, is_leaf = _preorder(tree, max_depth)
+            local = np.full(tree.node_count, -1, dtype=np.int64)
+            local[order] = np.arange(len(order))
+            ids = np.arange(len(order))
+
+            offsets.append(offset)
+            feature.append(np.where(is_leaf, 0, tree.feature[order]))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+            tree_left = np.where(is_leaf, ids, local[tree.children_left[order]])
+            tree_right = np.where(is_leaf, ids, local[tree.children_right[order]])
+            left.append(tree_left + offset)
+            delta.append(tree_right - tree_left)
+            leaf_row.append(np.where(is_leaf, np.cumsum(is_leaf) - 1 + leaf_offset, 0))
+
+            value = tree.value[order[is_leaf], 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+            leaf_proba.append(value / normalizer)
+
+            depth = max(depth, tree.max_depth if max_depth is None else min(tree.max_depth, max_depth))
+            offset += len(order)
+            leaf_offset += int(is_leaf.sum())
+
+        leaf_proba = np.concatenate(leaf_proba)
+        if quantize:
+            scale = np.iinfo(np.uint16).max
+            leaf_proba, proba_scale = np.rint(leaf_proba * scale).astype(np.uint16), 1.0 / (scale * n_trees)
+        else:
+            leaf_proba, proba_scale = (leaf_proba / n_trees).astype(np.float32), None
+
+        n_nodes = offset
+        return cls(
+            classes=np.asarray(model.classes_),
+            roots=np.asarray(offsets, dtype=np.int32),
+            feature=np.concatenate(feature).astype(np.uint8 if model.n_features_in_ <= 256 else np.intp),
+            threshold=_round_thresholds_down(np.concatenate(threshold)),
+            left=np.concatenate(left).astype(np.int32),
+            delta=np.concatenate(delta).astype(np.int32),
+            leaf_proba=leaf_proba,
+            max_depth=depth,
+            leaf_row=np.concatenate(leaf_row).astype(np.uint16 if leaf_offset <= 1 << 16 else np.int32),
+            proba_scale=proba_scale,
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        """Memory held by the node and leaf arrays."""
+        arrays = [self.roots, self.feature, self.threshold, self.left, self.delta, self.leaf_proba, self.leaf_row]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def apply(self, X):
+        """Returns the flat leaf index reached in every tree, shape (n_samples, n_trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if X.shape[0] == 1:
+            # Single row: resolve every split once, then each level is one gather
+            next_node = self.left + (X[0].take(self.feature) > self.threshold) * self.delta
+            node = self.roots
+            for _ in range(self.max_depth):
+                node = next_node.take(node)
+            return node.reshape(1, -1)
+
+        # Batch: walk all trees for all rows one level at a time
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots)))
+        rows = np.arange(X.shape[0])[:, None]
+        for _ in range(self.max_depth):
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = self.left[node] + go_right * self.delta[node]
+        return node
+
+    def predict_proba(self, X):
+        """Averaged class probabilities, matching RandomForestClassifier.predict_proba."""
+        nodes = self.apply(X)
+        if self.leaf_row is not None:
+            nodes = self.leaf_row[nodes]
+        proba = self.leaf_proba[nodes].sum(axis=1)
+        return proba if self.proba_scale is None else proba * self.proba_scale
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def rank_trees(model, X, max_trees=None):
+    """Orders the forest's trees so that every prefix best reproduces the full forest on X.
+
+    Greedy forward selection: each step adds the tree that most increases agreement
+    with the full forest's predicted class (no labels needed, so X can be training
+    inputs). Returns tree indices, most useful first.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    per_tree = np.stack([estimator.predict_proba(X) for estimator in model.estimators_])  # (trees, rows, classes)
+    target = per_tree.sum(axis=0).argmax(axis=1)
+
+    chosen, remaining = [], list(range(len(per_tree)))
+    votes = np.zeros(per_tree.shape[1:])
+    for _ in range(min(max_trees or len(remaining), len(remaining))):
+        agreement = ((votes + per_tree[remaining]).argmax(axis=2) == target).mean(axis=1)
+        best = remaining[int(agreement.argmax())]  # ties go to the lower index
+        chosen.append(best)
+        remaining.remove(best)
+        votes += per_tree[best]
+    return chosen
+
@@ -0,0 +1,44 @@
+# gunicorn.conf.py
+# --------------------------------------------------------------------------------
+# Production server settings: gunicorn -c gunicorn.conf.py app:app
+# --------------------------------------------------------------------------------
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('AGRI_AI_BIND', '0.0.0.0:' + os.environ.get('PORT', '5000'))
+workers = int(os.environ.get('AGRI_AI_WORKERS', multiprocessing.cpu_count()))
+# Threaded workers: requests waiting on slow upstream dashboard feeds, the micro-batcher
+# or password hashing don't hold up the worker's other requests.
+worker_class = 'gthread'
+threads = int(os.environ.get('AGRI_AI_THREADS', 8))
+
+# Load app.py (and the models) once in the master, before forking workers. Model
+# arrays are memory-mapped read-only from the artifacts (model_store.ARTIFACT_MMAP_MODE)
+# and anything else loaded here is shared copy-on-write, so adding workers does not
+# multiply model memory.
+preload_app = True
+
+# The master starts loading the models in the background when it imports app.py.
+# Waiting for them before the workers are forked keeps them shared; set
+# AGRI_AI_WAIT_FOR_MODELS=0 to fork at once and let each worker load its own copy.
+wait_for_models = os.environ.get('AGRI_AI_WAIT_FOR_MODELS', '1') == '1'
+
+
+def when_ready(server):
+    if wait_for_models:
+        import app
+        app.model_loader.wait()
+
+    # Move everything allocated so far out of the GC's reach, so collections in the
+    # workers don't write to (and so un-share) the preloaded objects' pages.
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Drop any connections the pool opened in the master; closing them here would close
+    # the master's sockets too, so they are just forgotten and each worker opens its own.
+    import app
+    with app.app.app_context():
+        app.db.engine.dispose(close=False)
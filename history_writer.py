@@ -0,0 +1,108 @@
+# history_writer.py
+# --------------------------------------------------------------------------------
+# Write-behind persistence: request handlers enqueue rows and return immediately; a
+# background thread drains the queue and hands the rows to `flush` in bulk (one
+# multi-row INSERT per batch), so storing history never adds latency to a request.
+# --------------------------------------------------------------------------------
+import atexit
+import os
+import queue
+import threading
+import time
+
+
+class WriteBehindQueue:
+    """Buffers rows in memory and flushes them in batches on a background thread.
+
+    `flush(rows)` is called with up to `max_batch_size` rows at least every
+    `flush_interval` seconds while rows are pending. The queue holds at most
+    `max_queue` rows; when it is full (the database is down or too slow) new rows
+    are dropped and counted instead of blocking requests. Rows still queued at exit
+    are flushed unless `drain_at_exit` is False.
+    """
+
+    def __init__(self, flush, max_batch_size=500, flush_interval=1.0, max_queue=10_000, name='write-behind',
+                 drain_at_exit=True):
+        self.flush = flush
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.name = name
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        if drain_at_exit:
+            atexit.register(self.drain)
+
+    def _ensure_started(self):
+        # Threads don't survive fork(): each (gunicorn) worker gets its own queue and thread
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(self.max_queue)
+                threading.Thread(target=self._run, args=(self._queue,), name=self.name, daemon=True).start()
+                self._pid = os.getpid()
+
+    def put(self, row):
+        """Queues one row; never blocks."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def put_many(self, rows):
+        for row in rows:
+            self.put(row)
+
+    def _collect(self, rows_queue, limit, timeout=None):
+        """Takes up to `limit` rows, waiting up to `timeout` (None = forever) for the first."""
+        rows = []
+        try:
+            rows.append(rows_queue.get(timeout=timeout))
+            while len(rows) < limit:
+                rows.append(rows_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _write(self, rows):
+        with self._flush_lock:
+            try:
+                self.flush(rows)
+                self.written += len(rows)
+                self.batches += 1
+            except Exception as e:
+                self.failed += len(rows)
+                print(f"Warning: {self.name} could not store {len(rows)} row(s): {e}")
+
+    def _run(self, rows_queue):
+        while True:
+            rows = self._collect(rows_queue, self.max_batch_size)
+            # Give a burst a moment to fill the batch before writing it
+            if len(rows) < self.max_batch_size:
+                time.sleep(self.flush_interval)
+                rows += self._collect(rows_queue, self.max_batch_size - len(rows), timeout=0)
+            self._write(rows)
+
+    def drain(self):
+        """Writes everything still queued in this process (called at exit)."""
+        if self._pid != os.getpid():
+            return
+        while True:
+            rows = self._collect(self._queue, self.max_batch_size, timeout=0)
+            if not rows:
+                return
+            self._write(rows)
+
+    def stats(self):
+        return {
+            'pending': self._queue.qsize() if self._pid == os.getpid() else 0,
+            'written': self.written, 'batches': self.batches,
+            'dropped': self.dropped, 'failed': self.failed,
+        }
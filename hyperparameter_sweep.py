@@ -0,0 +1,155 @@
+# hyperparameter_sweep.py
+# --------------------------------------------------------------------------------
+# Grid search over the crop forest and fertilizer KNN hyperparameters.
+# Candidates are fitted in parallel on a process pool and every result is cached
+# per training-data hash and feature encoding, so re-running a sweep only evaluates new grid points.
+#
+# Usage: python hyperparameter_sweep.py crop --workers 4
+#
+# With AGRI_AI_USE_SWEEP_PARAMS=1, training uses the best cached result for its data
+# instead of the defaults in crop_recommender / fertilizer_recommender (results are
+# read from model_store.ARTIFACT_DIR, where sweeps are cached by default). Saved
+# models record their parameters, so a better sweep result triggers a retrain.
+# --------------------------------------------------------------------------------
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import model_store
+
+DEFAULT_GRIDS = {
+    'crop': {'n_estimators': [50, 100, 200], 'max_depth': [None, 10, 20]},
+    'fertilizer': {'n_neighbors': [3, 5, 7, 11, 15]},
+}
+DEFAULT_DATA = {'crop': 'Crop_data.csv', 'fertilizer': 'Fertilizer_data.csv'}
+USE_SWEEP_PARAMS = os.environ.get('AGRI_AI_USE_SWEEP_PARAMS', '0') == '1'
+
+# Training split per (name, data file), reused by every candidate a worker evaluates
+_SPLITS = {}
+
+
+def _training_split(name, file_path):
+    import crop_recommender
+    import fertilizer_recommender
+
+    key = (name, file_path)
+    if key not in _SPLITS:
+        if name == 'crop':
+            _SPLITS[key] = crop_recommender.crop_training_split(file_path)
+        else:
+            _SPLITS[key] = fertilizer_recommender.fertilizer_training_split(file_path)[:4]
+    return _SPLITS[key]
+
+
+def _evaluate(name, file_path, params):
+    """Runs in a worker process: fits one candidate and returns its holdout accuracy."""
+    import crop_recommender
+    import fertilizer_recommender
+
+    X_train, X_test, y_train, y_test = _training_split(name, file_path)
+    if name == 'crop':
+        # One core per candidate; the pool provides the parallelism
+        model = crop_recommender.build_crop_model(n_jobs=1, **params)
+    else:
+        model = fertilizer_recommender.build_fertilizer_model(**params)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    return {'params': params, 'accuracy': model.score(X_test, y_test), 'fit_seconds': round(fit_seconds, 3)}
+
+
+def _grid_points(grid):
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def _feature_fingerprint(name):
+    """Changes with the feature encoding (the soil codes), so results from another encoding aren't reused."""
+    import soil_types
+
+    encoding = soil_types.SOIL_CODES if name == 'fertilizer' else {}
+    return hashlib.sha256(json.dumps(encoding, sort_keys=True).encode()).hexdigest()[:8]
+
+
+def _cache_path(name, data_hash, artifact_dir):
+    return os.path.join(artifact_dir or model_store.ARTIFACT_DIR,
+                        f"sweep-{name}-{data_hash[:16]}-{_feature_fingerprint(name)}.json")
+
+
+def run_sweep(name, file_path=None, grid=None, workers=None, artifact_dir=None):
+    """Evaluates every grid point not already cached. Returns the results, best first."""
+    file_path = file_path or DEFAULT_DATA[name]
+    grid = grid or DEFAULT_GRIDS[name]
+    cache_path = _cache_path(name, model_store.file_sha256(file_path), artifact_dir)
+
+    results = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as fh:
+            results = {json.dumps(r['params'], sort_keys=True): r for r in json.load(fh)}
+
+    todo = [params for params in _grid_points(grid) if json.dumps(params, sort_keys=True) not in results]
+    print(f"--- {name} sweep: {len(todo)} new candidate(s), {len(results)} cached ---")
+    if todo:
+        with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+            for result in pool.map(_evaluate, [name] * len(todo), [file_path] * len(todo), todo):
+                results[json.dumps(result['params'], sort_keys=True)] = result
+                print(f"   {result['params']}: {result['accuracy'] * 100:.2f}% ({result['fit_seconds']}s)")
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = model_store.temp_path(cache_path)
+        with open(tmp_path, 'w') as fh:
+            json.dump(list(results.values()), fh, indent=1)
+        os.replace(tmp_path, cache_path)
+
+    return _ranked(results.values())
+
+
+def _ranked(results):
+    # Best accuracy first; ties go to the cheaper fit
+    return sorted(results, key=lambda r: (-r['accuracy'], r['fit_seconds']))
+
+
+def best_params(name, data_hash, artifact_dir=None):
+    """The best cached parameters for the data with `data_hash`, or {} if it wasn't swept."""
+    cache_path = _cache_path(name, data_hash, artifact_dir)
+    if not os.path.exists(cache_path):
+        return {}
+    with open(cache_path) as fh:
+        results = _ranked(json.load(fh))
+    return results[0]['params'] if results else {}
+
+
+def tuned_params(name, data_hash):
+    """Parameters training should override its defaults with: best_params() when
+    USE_SWEEP_PARAMS is set, otherwise none."""
+    if not USE_SWEEP_PARAMS or data_hash is None:
+        return {}
+    return best_params(name, data_hash)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grid search over the Agri-AI model hyperparameters.")
+    parser.add_argument('models', nargs='+', choices=['crop', 'fertilizer'])
+    parser.add_argument('--workers', type=int, default=None, help="Candidates fitted in parallel (default: all cores)")
+    parser.add_argument('--crop-data', default=DEFAULT_DATA['crop'])
+    parser.add_argument('--fert-data', default=DEFAULT_DATA['fertilizer'])
+    parser.add_argument('--artifact-dir', default=None, help="Where sweep results are cached")
+    args = parser.parse_args(argv)
+
+    data = {'crop': args.crop_data, 'fertilizer': args.fert_data}
+    for name in args.models:
+        results = run_sweep(name, data[name], workers=args.workers, artifact_dir=args.artifact_dir)
+        print(f"\n{'accuracy':>9} {'fit (s)':>8}  params")
+        for result in results:
+            print(f"{result['accuracy'] * 100:>8.2f}% {result['fit_seconds']:>8.3f}  {result['params']}")
+        print(f"✅ Best {name} parameters: {results[0]['params']}\n")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
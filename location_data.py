@@ -1,4 +1,7 @@
 # location_data.py
+import gzip
+import hashlib
+import json
 
 LOCATION_DATA = {
     "Andhra Pradesh": [
@@ -111,3 +114,41 @@ LOCATION_DATA = {
         "Siddharthnagar", "Sitapur", "Sonbhadra", "Sultanpur", "Unnao", "Varanasi"
     ]
 }
+
+
+# --------------------------------------------------------------------------------
+# Precomputed views, built once at import
+# --------------------------------------------------------------------------------
+STATES = sorted(LOCATION_DATA)
+
+# Serialized map served by /api/v1/locations, with its gzip body and ETag
+LOCATION_DATA_JSON = json.dumps(LOCATION_DATA, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+LOCATION_DATA_GZIP = gzip.compress(LOCATION_DATA_JSON, compresslevel=9, mtime=0)
+LOCATION_DATA_ETAG = hashlib.sha256(LOCATION_DATA_JSON).hexdigest()[:16]
+
+# Lower-case district -> states it belongs to (a few names, e.g. Aurangabad, exist in two states)
+DISTRICT_STATES = {}
+for _state in STATES:
+    for _district in LOCATION_DATA[_state]:
+        DISTRICT_STATES.setdefault(_district.lower(), []).append(_state)
+
+# Lower-case prefix -> sorted (district, state) matches, for autocompletion
+_PREFIX_INDEX = {}
+for _district, _state in sorted((d, s) for s in STATES for d in LOCATION_DATA[s]):
+    _name = _district.lower()
+    for _end in range(1, len(_name) + 1):
+        _PREFIX_INDEX.setdefault(_name[:_end], []).append((_district, _state))
+del _state, _district, _name, _end
+
+
+def states_for_district(district):
+    """Returns the states containing a district (case-insensitive), or []."""
+    return DISTRICT_STATES.get(district.strip().lower(), [])
+
+
+def search_districts(prefix, limit=10):
+    """Returns up to `limit` (district, state) pairs whose name starts with `prefix` (case-insensitive)."""
+    prefix = prefix.strip().lower()
+    if not prefix:
+        return []
+    return _PREFIX_INDEX.get(prefix, [])[:limit]
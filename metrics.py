@@ -0,0 +1,240 @@
+# metrics.py
+# --------------------------------------------------------------------------------
+# In-process metrics for the hot paths: counters, histograms and timing spans,
+# rendered in the Prometheus text format on /metrics, plus an opt-in profiler that
+# dumps a cProfile for a sampled fraction of slow requests.
+# Standard library only. Each (gunicorn) worker keeps its own numbers and series
+# carry no worker label, so scrape workers individually or run one worker per target.
+# --------------------------------------------------------------------------------
+import bisect
+import cProfile
+import contextlib
+import os
+import random
+import re
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}  # label values tuple -> value
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. requests served."""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. queue depth."""
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (seconds, by default) in cumulative buckets."""
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, key, value):
+        counts, total, count = value[0], value[1], value[2]
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.label_names, key, [('le', _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that report other components' stats at scrape time.
+
+    A collector is a callable returning [(name, type, help, [(labels dict, value), ...]), ...].
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        for collector in list(self._collectors):
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"Warning: Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for name, metric_type, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'agri_ai_http_requests_total', 'HTTP requests served.', ('endpoint', 'method', 'status'))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'agri_ai_http_request_duration_seconds', 'Wall time per HTTP request.', ('endpoint',))
+STAGE_SECONDS = REGISTRY.histogram(
+    'agri_ai_stage_duration_seconds', 'Wall time per pipeline stage (see metrics.span).', ('stage',))
+ERRORS = REGISTRY.counter('agri_ai_errors_total', 'Errors raised, by pipeline stage.', ('stage',))
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    'agri_ai_db_query_duration_seconds', 'Wall time per database statement.', ('operation',))
+PROFILES_WRITTEN = REGISTRY.counter('agri_ai_profiles_written_total', 'Slow-request profiles dumped.')
+
+
+@contextlib.contextmanager
+def span(stage):
+    """Times a block (or, as a decorator, a function) into STAGE_SECONDS; exceptions count in ERRORS."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+# --------------------------------------------------------------------------------
+# Sampled profiling of slow requests
+# --------------------------------------------------------------------------------
+class SlowRequestProfiler:
+    """Profiles a random `sample_rate` fraction of requests; keeps those slower than `slow_ms`.
+
+    Profiles are written as `<output_dir>/<timestamp>-<name>-<ms>ms.prof` (open with
+    `python -m pstats` or snakeviz); at most `max_files` per process.
+    """
+
+    def __init__(self, sample_rate=0.0, slow_ms=500, output_dir='profiles', max_files=100):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.output_dir = output_dir
+        self.max_files = max_files
+        self.written = 0
+
+    def start(self):
+        """Returns a running cProfile.Profile for a sampled request, else None."""
+        if self.sample_rate <= 0 or self.written >= self.max_files or random.random() >= self.sample_rate:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None  # another profiler is already active
+        return profile
+
+    def finish(self, profile, seconds, name):
+        """Stops `profile` and dumps it if the request took at least slow_ms."""
+        profile.disable()
+        elapsed_ms = seconds * 1000
+        if elapsed_ms < self.slow_ms or self.written >= self.max_files:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+        path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}-{elapsed_ms:.0f}ms.prof")
+        profile.dump_stats(path)
+        self.written += 1
+        PROFILES_WRITTEN.inc()
+        print(f"⏱️  Slow request profiled ({elapsed_ms:.0f} ms): {path}")
+        return path
@@ -0,0 +1,100 @@
+# micro_batcher.py
+# --------------------------------------------------------------------------------
+# Server-side micro-batching: concurrent requests are collected for a few
+# milliseconds and scored together in one vectorized call.
+# --------------------------------------------------------------------------------
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Collects submitted items and passes them to `score_batch` in groups.
+
+    `score_batch(items)` must return one result per item, in order. A batch is
+    dispatched as soon as it reaches `max_batch_size` items or `max_wait_ms` after
+    its first item arrived, whichever comes first.
+    """
+
+    def __init__(self, score_batch, max_batch_size=64, max_wait_ms=5.0, name='micro-batcher'):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._ensure_started()
+
+    def _ensure_started(self):
+        # Threads don't survive fork(): a batcher created before gunicorn forks its
+        # workers (preload_app) starts a fresh queue and thread in each worker.
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, args=(self._queue,), name=self.name, daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def submit(self, item):
+        """Queues an item and returns a Future for its result."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def score(self, item, timeout=None):
+        """Submits an item and waits for its result."""
+        return self.submit(item).result(timeout)
+
+    def _collect(self, items_queue):
+        batch = [items_queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(items_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, items_queue):
+        while True:
+            # Skip items whose caller already cancelled them
+            batch = [(item, future) for item, future in self._collect(items_queue) if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+
+            try:
+                results = list(self.score_batch(items))
+                if len(results) != len(items):
+                    # Which result belongs to which item is unknown, so every caller gets the error
+                    raise RuntimeError(f"{self.name}: score_batch returned {len(results)} results "
+                                       f"for {len(items)} items")
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(items)
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms,
+        }
@@ -0,0 +1,74 @@
+# model_loader.py
+# --------------------------------------------------------------------------------
+# Background loading of the ML stack. Importing pandas/scikit-learn and loading (or
+# training) the models takes seconds, so the web app runs it on a thread and serves
+# auth pages, static pages and health probes in the meantime. Routes that need the
+# models check `ready` first.
+# --------------------------------------------------------------------------------
+import os
+import threading
+import time
+
+
+class ModelLoader:
+    """Runs `load()` once per process on a background thread and tracks its outcome.
+
+    `load()` returns True when every model is usable; an exception or a False
+    return leaves the loader in the 'failed' state with `error` set.
+    """
+
+    def __init__(self, load, name='model-loader'):
+        self._load = load
+        self.name = name
+        self.state = 'pending'  # pending -> loading -> ready | failed
+        self.error = None
+        self.started_at = None
+        self.seconds = None
+        self._pid = None
+        self._done = threading.Event()
+        self._start_lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    def ensure_started(self):
+        """Starts loading in this process unless it has already finished or is running.
+
+        A load still in progress when gunicorn forks its workers does not survive the
+        fork (threads don't), so each worker restarts it.
+        """
+        if self.ready or self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self.ready or self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.state, self.error = 'loading', None
+            self.started_at = time.time()
+            self._done = threading.Event()
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def _run(self):
+        try:
+            self.state = 'ready' if self._load() else 'failed'
+            if self.state == 'failed' and self.error is None:
+                self.error = "One or more models could not be loaded."
+        except Exception as e:
+            self.state, self.error = 'failed', str(e)
+        finally:
+            self.seconds = round(time.time() - self.started_at, 2)
+            self._done.set()
+            if self.ready:
+                print(f"✅ Models ready in {self.seconds}s")
+            else:
+                print(f"Warning: Model loading failed: {self.error}")
+
+    def wait(self, timeout=None):
+        """Starts loading if needed and blocks until it finishes. Returns `ready`."""
+        self.ensure_started()
+        self._done.wait(timeout)
+        return self.ready
+
+    def status(self):
+        return {'state': self.state, 'error': self.error, 'seconds': self.seconds}
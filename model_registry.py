@@ -0,0 +1,184 @@
+# model_registry.py
+# --------------------------------------------------------------------------------
+# Zero-downtime model reloads.
+# A candidate model is trained in a separate process (so the web process never
+# stalls on training), validated against a holdout accuracy threshold, saved as a
+# new artifact and then swapped in by loading that artifact. The recommenders keep
+# their active model in a single bundle reference, so the swap is atomic and
+# in-flight requests finish on the model they started with.
+# --------------------------------------------------------------------------------
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import crop_recommender
+import fertilizer_recommender
+import model_store
+
+# name -> (train function, install function, save function, load function)
+_MODEL_HOOKS = {
+    'crop': (
+        crop_recommender.train_crop_model,
+        lambda trained: crop_recommender._install_crop_model(trained[0], version=None, accuracy=trained[1]),
+        crop_recommender.save_crop_model,
+        crop_recommender.load_crop_model,
+    ),
+    'fertilizer': (
+        fertilizer_recommender.train_fertilizer_model,
+        lambda trained: fertilizer_recommender._install_fertilizer_model(trained[0], trained[1], version=None, accuracy=trained[2]),
+        fertilizer_recommender.save_fertilizer_model,
+        fertilizer_recommender.load_fertilizer_model,
+    ),
+}
+
+
+def _train_candidate(name, file_path, data_hash, artifact_dir, min_accuracy):
+    """Runs in the training process: trains, validates and saves a candidate model."""
+    train, install, save, _ = _MODEL_HOOKS[name]
+    trained = train(file_path, data_hash)
+    if trained is None:
+        raise FileNotFoundError(f"{name} data file not found at {file_path}")
+
+    accuracy = trained[-1]
+    if accuracy < min_accuracy:
+        raise ValueError(f"{name} candidate accuracy {accuracy:.2%} is below the {min_accuracy:.2%} threshold")
+
+    install(trained)
+    return save(data_hash, artifact_dir)['version']
+
+
+class ModelRegistry:
+    """Tracks the active model versions and reloads them in the background."""
+
+    def __init__(self, data_paths, min_accuracy, artifact_dir=None):
+        self.data_paths = dict(data_paths)      # name -> training CSV
+        self.min_accuracy = dict(min_accuracy)  # name -> holdout accuracy threshold
+        self.artifact_dir = artifact_dir
+        self.in_progress = False
+        self.history = deque(maxlen=20)         # recent reload events, newest last
+        self._lock = threading.Lock()
+        self._data_hashes = {}
+        self._watched = {}
+        self._watcher_pid = None
+        for name, path in self.data_paths.items():
+            self._data_hashes[name] = self._hash(path)
+            self._watched[name] = self._stat(path)
+
+    @staticmethod
+    def _hash(path):
+        try:
+            return model_store.file_sha256(path)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+
+    def reload(self, names=None, force=False, wait=False):
+        """Reloads the given models (all by default) in the background.
+
+        Returns False if a reload is already running. With wait=True, blocks until done.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        self.in_progress = True
+        thread = threading.Thread(target=self._reload, args=(list(names or self.data_paths), force),
+                                  name='model-reload', daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def _reload(self, names, force):
+        try:
+            for name in names:
+                self._reload_one(name, force)
+        finally:
+            self.in_progress = False
+            self._lock.release()
+
+    def _reload_one(self, name, force):
+        path = self.data_paths[name]
+        load = _MODEL_HOOKS[name][3]
+        started = time.time()
+        event = {'model': name, 'started_at': started, 'status': None, 'version': None, 'error': None}
+
+        try:
+            data_hash = model_store.file_sha256(path)
+            if not force and data_hash == self._data_hashes.get(name):
+                event['status'] = 'unchanged'
+                return
+
+            # Every worker's watcher sees the change; the lock lets one of them train while
+            # the others wait, then find that worker's (or the training CLI's) artifact.
+            with model_store.artifact_lock(self.artifact_dir):
+                if force or not load(data_hash, self.artifact_dir, self.min_accuracy[name]):
+                    # spawn: never fork a multi-threaded web process
+                    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                        pool.submit(_train_candidate, name, path, data_hash, self.artifact_dir,
+                                    self.min_accuracy[name]).result()
+                    # Swap in by loading the saved artifact (memory-mapped, so this is quick)
+                    if not load(data_hash, self.artifact_dir, self.min_accuracy[name]):
+                        raise RuntimeError(f"could not load the new {name} artifact")
+
+            self._data_hashes[name] = data_hash
+            event['status'] = 'swapped'
+            event['version'] = self.versions()[name]
+            print(f"🔄 {name} model swapped to version {event['version']}")
+        except Exception as e:
+            # The active model stays in place on any failure
+            event['status'] = 'failed'
+            event['error'] = str(e)
+            print(f"Warning: {name} model reload failed, keeping the active model: {e}")
+        finally:
+            event['seconds'] = round(time.time() - started, 2)
+            self.history.append(event)
+
+    def check_for_changes(self):
+        """Reloads any model whose training CSV changed on disk since the last check."""
+        stats = {name: self._stat(path) for name, path in self.data_paths.items()}
+        changed = [name for name, stat in stats.items() if stat != self._watched.get(name)]
+        # If a reload is already running, leave the change pending for the next check
+        if changed and self.reload(changed):
+            self._watched.update({name: stats[name] for name in changed})
+        return changed
+
+    def ensure_watcher(self, interval):
+        """Starts the polling file watcher in this process (threads don't survive fork)."""
+        if not interval or self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                self.check_for_changes()
+
+        threading.Thread(target=watch, name='model-watcher', daemon=True).start()
+
+    @staticmethod
+    def versions():
+        return {
+            'crop': crop_recommender.CROP_MODEL_VERSION,
+            'fertilizer': fertilizer_recommender.FERTILIZER_MODEL_VERSION,
+        }
+
+    def status(self):
+        return {
+            'versions': self.versions(),
+            'accuracy': {
+                'crop': crop_recommender.CROP_MODEL_ACCURACY,
+                'fertilizer': fertilizer_recommender.FERTILIZER_MODEL_ACCURACY,
+            },
+            'min_accuracy': self.min_accuracy,
+            'reload_in_progress': self.in_progress,
+            'history': list(self.history),
+        }
@@ -0,0 +1,185 @@
+# model_store.py
+# --------------------------------------------------------------------------------
+# Versioned model artifacts: train once, save to disk, load on startup.
+# --------------------------------------------------------------------------------
+import argparse
+import contextlib
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import sklearn
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves stay atomic, but concurrent trainers aren't serialized
+    fcntl = None
+
+ARTIFACT_DIR = os.environ.get('AGRI_AI_MODEL_DIR', 'models')
+ARTIFACT_FORMAT_VERSION = 1
+# Artifacts are saved uncompressed, so their numpy arrays can be memory-mapped
+# read-only: every worker process then shares one physical copy through the OS
+# page cache. Set AGRI_AI_MODEL_MMAP='' to load private in-memory copies instead.
+ARTIFACT_MMAP_MODE = os.environ.get('AGRI_AI_MODEL_MMAP', 'r') or None
+
+# Callbacks run whenever a model is trained or (re)loaded, e.g. to drop cached results.
+_model_change_listeners = []
+
+
+def add_model_change_listener(callback):
+    """Registers callback(name) to be called after the model `name` is trained or reloaded."""
+    if callback not in _model_change_listeners:  # a model load restarted after fork registers again
+        _model_change_listeners.append(callback)
+
+
+def notify_model_changed(name):
+    for callback in list(_model_change_listeners):
+        callback(name)
+
+
+def file_sha256(file_path, chunk_size=1 << 20):
+    """Returns the hex SHA-256 of a file, used to tie an artifact to its training data."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as fh:
+        for block in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_path(name, artifact_dir=None):
+    return os.path.join(artifact_dir or ARTIFACT_DIR, f"{name}.joblib")
+
+
+def temp_path(path):
+    """A temp file name next to `path` for write-then-os.replace saves.
+
+    Unique per process and thread, so concurrent writers (e.g. gunicorn workers) never
+    write into or replace each other's temp file.
+    """
+    return f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+
+# lockf() locks only exclude other processes; this one serializes threads within a process
+_artifact_thread_lock = threading.Lock()
+
+
+def _reset_artifact_thread_lock():
+    # A child forked while a thread of the parent held the lock would otherwise wait forever
+    global _artifact_thread_lock
+    _artifact_thread_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_artifact_thread_lock)
+
+
+@contextlib.contextmanager
+def artifact_lock(artifact_dir=None):
+    """Holds an exclusive lock on the artifact directory, shared by all processes.
+
+    Taken around training so that only one process trains a given version; the others
+    wait, then find and load the artifact it saved. lockf() locks belong to the process,
+    so workers forked while the master holds the lock don't inherit it.
+    """
+    directory = artifact_dir or ARTIFACT_DIR
+    os.makedirs(directory, exist_ok=True)
+    with _artifact_thread_lock, open(os.path.join(directory, '.train.lock'), 'a') as fh:
+        if fcntl is not None:
+            fcntl.lockf(fh, fcntl.LOCK_EX)
+        yield  # closing the file releases the lock
+
+
+def save_artifact(name, payload, data_hash, artifact_dir=None):
+    """Saves a fitted model bundle together with its data hash and a new version tag."""
+    path = artifact_path(name, artifact_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    artifact = dict(payload)
+    artifact.update({
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'sklearn_version': sklearn.__version__,
+        'name': name,
+        'data_hash': data_hash,
+        'version': f"{time.strftime('%Y%m%d%H%M%S')}-{data_hash[:8]}",
+    })
+
+    # Write to a temp file first so a crashed save never leaves a half-written artifact.
+    tmp_path = temp_path(path)
+    try:
+        joblib.dump(artifact, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    print(f"💾 Saved {name} artifact (version {artifact['version']}) to {path}")
+    return artifact
+
+
+def load_artifact(name, data_hash=None, artifact_dir=None):
+    """Loads an artifact, or returns None if it is missing, stale or from another sklearn."""
+    path = artifact_path(name, artifact_dir)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        artifact = joblib.load(path, mmap_mode=ARTIFACT_MMAP_MODE)
+    except Exception as e:
+        print(f"Warning: Could not read {name} artifact at {path}: {e}")
+        return None
+
+    if artifact.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        return None
+    if artifact.get('sklearn_version') != sklearn.__version__:
+        print(f"Warning: {name} artifact was built with scikit-learn {artifact.get('sklearn_version')}; retraining.")
+        return None
+    if data_hash is not None and artifact.get('data_hash') != data_hash:
+        print(f"   {name} artifact is stale (training data changed); retraining.")
+        return None
+    return artifact
+
+
+def load_or_train_all(crop_data='Crop_data.csv', fert_data='Fertilizer_data.csv', artifact_dir=None,
+                      force_retrain=False):
+    """Loads (or trains) the crop and fertilizer models concurrently. Returns (crop_ok, fert_ok)."""
+    # Imported here so the recommender modules can import this one without a cycle.
+    import crop_recommender
+    import fertilizer_recommender
+
+    # Without preload_app every worker starts here: one trains while the others wait and
+    # then load its artifacts. sklearn releases the GIL while fitting, so the two fits
+    # overlap on threads.
+    with artifact_lock(artifact_dir), ThreadPoolExecutor(max_workers=2) as pool:
+        crop = pool.submit(crop_recommender.load_or_train_crop_model, crop_data, artifact_dir, force_retrain)
+        fert = pool.submit(fertilizer_recommender.load_or_train_fertilizer_model, fert_data, artifact_dir, force_retrain)
+        return crop.result(), fert.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the Agri-AI models and save them as versioned artifacts.")
+    parser.add_argument('command', choices=['train', 'compact'],
+                        help="'compact' prints the crop model's size/latency/accuracy trade-offs")
+    parser.add_argument('--crop-data', default='Crop_data.csv')
+    parser.add_argument('--fert-data', default='Fertilizer_data.csv')
+    parser.add_argument('--artifact-dir', default=None)
+    parser.add_argument('--force', action='store_true', help="Retrain even if the saved artifact is up to date.")
+    parser.add_argument('--max-mb', type=float, default=None, help="compact: crop model size budget")
+    parser.add_argument('--max-latency-us', type=float, default=None, help="compact: single-row latency budget")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compact':
+        import crop_recommender
+        # Serve the chosen model with AGRI_AI_CROP_MAX_MB / AGRI_AI_CROP_MAX_LATENCY_US and `train --force`
+        return 0 if crop_recommender.crop_compaction_report(args.crop_data, args.max_mb, args.max_latency_us) else 1
+
+    start = time.perf_counter()
+    crop_ok, fert_ok = load_or_train_all(args.crop_data, args.fert_data, args.artifact_dir, force_retrain=args.force)
+    print(f"⏱️  Done in {time.perf_counter() - start:.1f}s")
+    return 0 if crop_ok and fert_ok else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
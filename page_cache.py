@@ -0,0 +1,259 @@
+# page_cache.py
+# --------------------------------------------------------------------------------
+# Rendered-output caching and compression for the web pages.
+# PageCache keeps fully rendered static pages (per user, since base.html shows who is
+# logged in) with their ETag and compressed bodies, so a hit costs neither a Jinja
+# render nor a compression pass, and a revalidation costs an empty 304. FragmentCache
+# keeps rendered template fragments that don't depend on the user (the dashboard's
+# location selector). compress_response() gzip/brotli-encodes other text responses,
+# and the static file view serves .br/.gz copies written by precompress_static().
+# Brotli is used when the `brotli` package is installed, gzip otherwise.
+# --------------------------------------------------------------------------------
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, request, send_from_directory, session
+from markupsafe import Markup
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'application/javascript',
+    'application/json', 'application/xml', 'image/svg+xml',
+}
+STATIC_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.xml', '.csv', '.map'}
+COMPRESS_MIN_SIZE = 500  # bytes; smaller bodies gain less than the header costs
+
+# Per-response levels stay fast; cached bodies and static files are compressed once, at maximum
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def encode(body, encoding, best=False):
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if best else BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=9 if best else GZIP_LEVEL, mtime=0)
+
+
+def preferred_encoding(accept_encodings, encodings=None):
+    """The best encoding in `encodings` (default: all available) the client accepts, or None."""
+    best, best_quality = None, 0
+    for encoding in encodings or available_encodings():
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_response(response, min_size=COMPRESS_MIN_SIZE):
+    """Compresses a buffered text response in place if the client accepts it (after_request hook)."""
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = preferred_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(encode(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # The encoded body is a different representation of the same page
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+# --------------------------------------------------------------------------------
+# Page and fragment caches
+# --------------------------------------------------------------------------------
+class RenderCache:
+    """Thread-safe LRU cache of rendered output; subclasses wrap what `render()` returns."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _wrap(self, rendered):
+        return rendered
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Render outside the lock; two concurrent misses just render twice
+        entry = self._wrap(render())
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = entry
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def clear(self, *_):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+class FragmentCache(RenderCache):
+    """Rendered template fragments (Markup), keyed by what they depend on."""
+
+    def _wrap(self, rendered):
+        return Markup(rendered)
+
+
+class CachedPage:
+    """A rendered page: its body, ETag and (lazily) compressed bodies."""
+
+    def __init__(self, body):
+        self.body = body.encode('utf-8') if isinstance(body, str) else body
+        self.etag = hashlib.sha256(self.body).hexdigest()[:16]
+        self._encoded = {}
+
+    def encoded(self, encoding):
+        if encoding is None:
+            return self.body
+        if encoding not in self._encoded:
+            self._encoded[encoding] = encode(self.body, encoding, best=True)
+        return self._encoded[encoding]
+
+
+class PageCache(RenderCache):
+    """Whole rendered pages, served with ETag/304 and precompressed bodies."""
+
+    def __init__(self, maxsize=1024):
+        super().__init__(maxsize)
+        self.not_modified = 0
+
+    def _wrap(self, rendered):
+        return CachedPage(rendered)
+
+    def respond(self, page):
+        """The response for `page`: 304 if the client's copy is current, else the best encoding."""
+        encoding = preferred_encoding(request.accept_encodings)
+        response = Response(page.encoded(encoding), mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(f"{page.etag}-{encoding}" if encoding else page.etag)
+        # Browsers keep the page but revalidate on every visit: the 304 is a few hundred bytes
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Accept-Encoding')
+        response.vary.add('Cookie')
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            with self._lock:
+                self.not_modified += 1
+        return response
+
+    def page(self, key_func):
+        """Decorator for GET views whose HTML depends only on the endpoint and `key_func()`.
+
+        Requests with pending flash messages are rendered normally, since the messages
+        are part of that one page.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                    return view(*args, **kwargs)
+                page = self.get_or_render((request.endpoint, key_func()), lambda: view(*args, **kwargs))
+                return self.respond(page)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        return dict(super().stats(), not_modified=self.not_modified)
+
+
+# --------------------------------------------------------------------------------
+# Precompressed static files
+# --------------------------------------------------------------------------------
+def precompress_static(static_folder, min_size=COMPRESS_MIN_SIZE):
+    """Writes <file>.gz (and <file>.br with brotli) next to each compressible static file.
+
+    Copies that are newer than their source are kept. Returns the number written.
+    """
+    written = 0
+    for root, _dirs, files in os.walk(static_folder):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1].lower() not in STATIC_EXTENSIONS or os.path.getsize(path) < min_size:
+                continue
+            mtime = os.path.getmtime(path)
+            body = None
+            for encoding, suffix in (('gzip', '.gz'), ('br', '.br')):
+                if encoding not in available_encodings():
+                    continue
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                    continue
+                if body is None:
+                    with open(path, 'rb') as f:
+                        body = f.read()
+                # Every worker runs this at startup; each writes its own temp file
+                tmp_path = f"{target}.{os.getpid()}.tmp"
+                try:
+                    with open(tmp_path, 'wb') as f:
+                        f.write(encode(body, encoding, best=True))
+                    os.replace(tmp_path, target)
+                    written += 1
+                except OSError as e:
+                    print(f"Warning: Could not precompress {path}: {e}")
+                    return written
+    return written
+
+
+def send_static(app):
+    """A replacement for Flask's static view that serves precompressed copies when accepted."""
+    suffixes = {'br': '.br', 'gzip': '.gz'}
+
+    def static(filename):
+        if os.path.splitext(filename)[1].lower() not in STATIC_EXTENSIONS:
+            return app.send_static_file(filename)
+        path = safe_join(app.static_folder, filename)
+        if path and os.path.isfile(path):
+            # Only copies at least as new as the file itself (precompress_static() rewrites stale ones)
+            present = [encoding for encoding in available_encodings()
+                       if os.path.isfile(path + suffixes[encoding])
+                       and os.path.getmtime(path + suffixes[encoding]) >= os.path.getmtime(path)]
+            encoding = preferred_encoding(request.accept_encodings, present) if present else None
+            if encoding:
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                response = send_from_directory(app.static_folder, filename + suffixes[encoding], mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                return response
+        response = app.send_static_file(filename)
+        response.vary.add('Accept-Encoding')
+        return response
+    return static
@@ -0,0 +1,118 @@
+# password_hashing.py
+# --------------------------------------------------------------------------------
+# Password hashing off the request threads.
+# werkzeug's hashes are deliberately slow (~0.1s for the default scrypt), so a burst
+# of logins could tie up every web worker. Hashes run on a small dedicated pool; when
+# more than `max_pending` are queued, new requests are refused immediately
+# (PasswordHashingBusy -> HTTP 429) instead of piling up behind the burst.
+# --------------------------------------------------------------------------------
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import metrics
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing queue is full; the caller should retry later."""
+
+
+class PasswordHasher:
+    """Bounded executor for werkzeug password hashing and verification.
+
+    `method` is any werkzeug method string ('scrypt', 'scrypt:16384:8:1',
+    'pbkdf2:sha256:600000', ...); None uses werkzeug's default. hashlib's scrypt and
+    pbkdf2 release the GIL, so the pool's threads hash in parallel.
+    """
+
+    def __init__(self, method=None, workers=None, max_pending=32, timeout=10.0):
+        self.method = method
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.rejected = 0
+        self.completed = 0
+        self._method_prefix = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def configure(self, method=None, workers=None, max_pending=None, timeout=None):
+        """Changes the settings; hashes made with an older method are upgraded on login."""
+        with self._lock:
+            self.method = method
+            self._method_prefix = None
+            if workers:
+                self.workers = workers  # the pool is resized on next use
+            if max_pending is not None:
+                self.max_pending = max_pending
+            if timeout is not None:
+                self.timeout = timeout
+
+    @property
+    def method_prefix(self):
+        """The fully expanded method string (e.g. 'scrypt:32768:8:1') that prefixes new hashes."""
+        if self._method_prefix is None:
+            sample = generate_password_hash('', self.method) if self.method else generate_password_hash('')
+            self._method_prefix = sample.split('$', 1)[0]
+        return self._method_prefix
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            # Threads don't survive fork(): each (gunicorn) worker gets its own pool
+            if self._pid != os.getpid():
+                self._executor = None
+                self._pending = 0
+                self._pid = os.getpid()
+            if self._executor is None or self._executor._max_workers != self.workers:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHashingBusy(f"{self._pending} password hashes already queued")
+            self._pending += 1
+            future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHashingBusy(f"password hash not done within {self.timeout}s")
+
+    def _done(self, _future):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def hash(self, password):
+        """Returns a new hash of `password` with the configured method."""
+        with metrics.span('auth.password_hash'):
+            if self.method:
+                return self._submit(generate_password_hash, password, self.method)
+            return self._submit(generate_password_hash, password)
+
+    def verify(self, password_hash, password):
+        """Checks `password` against a stored hash."""
+        with metrics.span('auth.password_verify'):
+            return self._submit(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if `password_hash` was made with a different method or cost than configured."""
+        return (password_hash or '').split('$', 1)[0] != self.method_prefix
+
+    def stats(self):
+        # Outside the lock: the first call computes a full hash, which must not hold up the hashers
+        method = self.method_prefix
+        with self._lock:
+            return {
+                'method': method, 'workers': self.workers, 'max_pending': self.max_pending,
+                'pending': self._pending, 'completed': self.completed, 'rejected': self.rejected,
+            }
+
+
+PASSWORD_HASHER = PasswordHasher()
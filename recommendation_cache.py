@@ -0,0 +1,117 @@
+# recommendation_cache.py
+# --------------------------------------------------------------------------------
+# Bounded, thread-safe LRU cache in front of the crop and fertilizer recommenders.
+# Inputs are quantized to INPUT_DECIMALS before lookup so repeated soil-test values
+# (lab reports round N/P/K to integers, pH to one decimal) share one entry, and the
+# models always score the quantized values, so a hit returns exactly what a miss
+# would have computed. Inputs with more decimals are therefore scored as rounded
+# (N=90.004 scores as N=90.0), which can shift a confidence slightly.
+# --------------------------------------------------------------------------------
+import threading
+import time
+from collections import OrderedDict
+
+import crop_recommender
+import fertilizer_recommender
+import model_store
+
+# Decimal places kept per input before lookup/scoring. None keeps the value as is.
+INPUT_DECIMALS = {'N': 2, 'P': 2, 'K': 2, 'temp': 2, 'hum': 2, 'ph': 2, 'rain': 2}
+
+
+class RecommendationCache:
+    """LRU cache with optional TTL and hit/miss counters."""
+
+    def __init__(self, maxsize=4096, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._generation = 0  # bumped on clear() so in-flight misses don't store stale results
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize=None, ttl=None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            self.ttl = ttl
+            self._generation += 1
+            self._entries.clear()
+
+    def get_or_compute(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        # Compute outside the lock so a slow miss never blocks other lookups
+        value = compute()
+        if self.maxsize <= 0:
+            return value
+
+        expires_at = now + self.ttl if self.ttl else None
+        with self._lock:
+            if generation != self._generation:
+                return value
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self, *_):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+RECOMMENDATION_CACHE = RecommendationCache()
+# Any retrain or reload makes every cached result stale
+model_store.add_model_change_listener(RECOMMENDATION_CACHE.clear)
+
+
+def quantize_inputs(**inputs):
+    """Rounds the numeric inputs to INPUT_DECIMALS; the soil type is normalized as a string."""
+    quantized = {}
+    for name, value in inputs.items():
+        if name == 'soil_type':
+            quantized[name] = str(value).strip()
+        else:
+            decimals = INPUT_DECIMALS.get(name)
+            value = float(value)
+            quantized[name] = round(value, decimals) + 0.0 if decimals is not None else value  # + 0.0 folds -0.0
+    return quantized
+
+
+def cached_rank_crops(N, P, K, temp, hum, ph, rain):
+    """crop_recommender.rank_crops() on quantized inputs, served from the cache when possible."""
+    q = quantize_inputs(N=N, P=P, K=K, temp=temp, hum=hum, ph=ph, rain=rain)
+    key = ('crop', crop_recommender.CROP_MODEL_VERSION) + tuple(q.values())
+    return RECOMMENDATION_CACHE.get_or_compute(key, lambda: crop_recommender.rank_crops(**q))
+
+
+def cached_recommend_fertilizer(N, P, K, temp, humidity, ph, soil_type):
+    """fertilizer_recommender.recommend_fertilizer() on quantized inputs, served from the cache when possible."""
+    q = quantize_inputs(N=N, P=P, K=K, temp=temp, hum=humidity, ph=ph, soil_type=soil_type)
+    key = ('fertilizer', fertilizer_recommender.FERTILIZER_MODEL_VERSION) + tuple(q.values())
+    return RECOMMENDATION_CACHE.get_or_compute(key, lambda: fertilizer_recommender.recommend_fertilizer(
+        N=q['N'], P=q['P'], K=q['K'], temp=q['temp'], humidity=q['hum'], ph=q['ph'], soil_type=q['soil_type']
+    ))
@@ -0,0 +1,120 @@
+# recommendation_service.py
+# --------------------------------------------------------------------------------
+# Combined crop + fertilizer scoring shared by the JSON API, the micro-batcher and
+# bulk jobs. Every entry point scores whole blocks with the batch model functions;
+# recommend_one() serves a single web form input through the recommendation cache.
+# --------------------------------------------------------------------------------
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import crop_recommender
+import fertilizer_recommender
+import metrics
+from micro_batcher import MicroBatcher
+from recommendation_cache import cached_rank_crops, cached_recommend_fertilizer, quantize_inputs
+
+# Input fields of one recommendation request (same names as the /recommender form,
+# except 'ph'; 'pH' is accepted too).
+INPUT_FIELDS = ['N', 'P', 'K', 'temp', 'hum', 'ph', 'rain', 'soil_type']
+INPUT_ALIASES = {'pH': 'ph', 'humidity': 'hum', 'rainfall': 'rain', 'temperature': 'temp'}
+
+BATCHER = None
+
+# Threads running the fertilizer model next to the crop model (see recommend_one)
+INFERENCE_WORKERS = 4
+_inference_executor = None
+_inference_pid = None
+_inference_lock = threading.Lock()
+
+
+def parse_sample(raw):
+    """Validates one input dict and returns it quantized. Raises ValueError on bad input."""
+    if not isinstance(raw, dict):
+        raise ValueError("Each sample must be a JSON object.")
+    sample = {INPUT_ALIASES.get(key, key): value for key, value in raw.items()}
+
+    missing = [field for field in INPUT_FIELDS if sample.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing field(s): {', '.join(missing)}")
+    try:
+        numeric = {field: float(sample[field]) for field in INPUT_FIELDS if field != 'soil_type'}
+    except (TypeError, ValueError):
+        raise ValueError("N, P, K, temp, hum, ph and rain must be numbers.")
+    if not all(np.isfinite(list(numeric.values()))):
+        raise ValueError("Input values must be finite numbers.")
+
+    # Quantized exactly like the cached HTML path, so both return the same answers
+    return quantize_inputs(soil_type=sample['soil_type'], **numeric)
+
+
+def score_samples(samples, top_k=crop_recommender.CROP_TOP_K):
+    """Scores parsed samples with one crop and one fertilizer batch call; returns result dicts."""
+    if not samples:
+        return []
+
+    crop_rows = [[s['N'], s['P'], s['K'], s['temp'], s['hum'], s['ph'], s['rain']] for s in samples]
+    fert_rows = [[s['N'], s['P'], s['K'], s['temp'], s['hum'], s['ph'], s['soil_type']] for s in samples]
+    crop_labels, crop_conf = crop_recommender.rank_crops_batch(crop_rows, top_k)
+    fert_labels, fert_conf = fertilizer_recommender.recommend_fertilizers_batch(fert_rows)
+
+    results = []
+    for i in range(len(samples)):
+        ranked = [
+            {'crop': str(label), 'confidence': round(float(conf), 2)}
+            for label, conf in zip(crop_labels[i], crop_conf[i]) if conf > 0
+        ]
+        results.append({
+            'crop': ranked[0]['crop'],
+            'confidence': ranked[0]['confidence'],
+            'alternatives': ranked[1:],
+            'fertilizer': str(fert_labels[i]),
+            'fertilizer_confidence': round(float(fert_conf[i]), 2),
+        })
+    return results
+
+
+def _inference_pool():
+    # Threads don't survive fork(): each (gunicorn) worker gets its own pool
+    global _inference_executor, _inference_pid
+    with _inference_lock:
+        if _inference_pid != os.getpid():
+            _inference_executor = ThreadPoolExecutor(INFERENCE_WORKERS, thread_name_prefix='inference')
+            _inference_pid = os.getpid()
+        return _inference_executor
+
+
+def recommend_one(N, P, K, temp, hum, ph, rain, soil_type, concurrent=True):
+    """(ranked crops, fertilizer) for one input, each served from the recommendation cache.
+
+    With `concurrent`, the fertilizer model runs on the inference pool while the crop
+    model runs in the calling thread, so a miss costs the slower model, not both.
+    """
+    def fertilizer():
+        with metrics.span('recommender.fertilizer'):
+            return cached_recommend_fertilizer(N=N, P=P, K=K, temp=temp, humidity=hum, ph=ph, soil_type=soil_type)
+
+    pending = _inference_pool().submit(fertilizer) if concurrent else None
+    with metrics.span('recommender.crop'):
+        ranked_crops = cached_rank_crops(N, P, K, temp, hum, ph, rain)
+    return ranked_crops, pending.result() if pending else fertilizer()
+
+
+def model_versions():
+    return {
+        'crop': crop_recommender.CROP_MODEL_VERSION,
+        'fertilizer': fertilizer_recommender.FERTILIZER_MODEL_VERSION,
+    }
+
+
+def configure_batcher(max_batch_size, max_wait_ms):
+    """Starts (or reconfigures) the shared micro-batcher used for single API requests."""
+    global BATCHER
+    if BATCHER is None:
+        BATCHER = MicroBatcher(score_samples, max_batch_size, max_wait_ms, name='recommendation-batcher')
+    else:
+        BATCHER.max_batch_size = max_batch_size
+        BATCHER.max_wait_ms = max_wait_ms
+    return BATCHER
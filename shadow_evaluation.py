@@ -0,0 +1,192 @@
+# shadow_evaluation.py
+# --------------------------------------------------------------------------------
+# Shadow evaluation of candidate models on live traffic.
+# A sampled fraction of recommender inputs is queued (never blocking the request) and
+# scored in batches on a background thread by both the live models and the candidates
+# read from a separate artifact directory, e.g. one built on the new season's data:
+#     python model_store.py train --crop-data ... --fert-data ... --artifact-dir models/candidate
+# Candidates are never activated. The report gives, per model, how often the candidate
+# agrees with the live model, how its confidence differs, and what each costs per row.
+# --------------------------------------------------------------------------------
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+import crop_recommender
+import fertilizer_recommender
+import model_store
+from history_writer import WriteBehindQueue
+
+
+def _crop_rows(samples):
+    return [[s['N'], s['P'], s['K'], s['temp'], s['hum'], s['ph'], s['rain']] for s in samples]
+
+
+def _fertilizer_rows(samples):
+    return [[s['N'], s['P'], s['K'], s['temp'], s['hum'], s['ph'], s['soil_type']] for s in samples]
+
+
+def _score_crops(rows, bundle):
+    labels, confidences = crop_recommender.rank_crops_batch(rows, top_k=1, bundle=bundle)
+    return labels[:, 0], confidences[:, 0]
+
+
+# name -> (read candidate, live bundle, input rows, scorer returning (labels, confidences))
+_MODELS = {
+    'crop': (crop_recommender.read_crop_model, lambda: crop_recommender.CROP_BUNDLE, _crop_rows, _score_crops),
+    'fertilizer': (
+        fertilizer_recommender.read_fertilizer_model, lambda: fertilizer_recommender.FERTILIZER_BUNDLE,
+        _fertilizer_rows, lambda rows, bundle: fertilizer_recommender.recommend_fertilizers_batch(rows, bundle),
+    ),
+}
+
+
+class Comparison:
+    """Running live-vs-candidate statistics for one model."""
+
+    def __init__(self, live_version, candidate_version, max_examples=20):
+        self.live_version = live_version
+        self.candidate_version = candidate_version
+        self.samples = 0
+        self.agreed = 0
+        self.confidence_delta_sum = 0.0      # candidate - live confidence of each one's top answer
+        self.abs_confidence_delta_sum = 0.0
+        self.live_seconds = 0.0
+        self.candidate_seconds = 0.0
+        self.changes = Counter()             # (live answer, candidate answer) -> count, disagreements only
+        self.examples = deque(maxlen=max_examples)
+        self.candidate_row_us = deque(maxlen=1000)  # per-row candidate cost of recent batches
+
+    def add(self, samples, live, candidate, live_seconds, candidate_seconds):
+        (live_labels, live_conf), (candidate_labels, candidate_conf) = live, candidate
+        agree = live_labels == candidate_labels
+        delta = np.asarray(candidate_conf, dtype=float) - np.asarray(live_conf, dtype=float)
+        self.samples += len(samples)
+        self.agreed += int(agree.sum())
+        self.confidence_delta_sum += float(delta.sum())
+        self.abs_confidence_delta_sum += float(np.abs(delta).sum())
+        self.live_seconds += live_seconds
+        self.candidate_seconds += candidate_seconds
+        self.candidate_row_us.append(candidate_seconds / len(samples) * 1e6)
+        for i in np.flatnonzero(~agree):
+            self.changes[str(live_labels[i]), str(candidate_labels[i])] += 1
+            self.examples.append({'input': samples[i], 'live': str(live_labels[i]),
+                                  'candidate': str(candidate_labels[i]),
+                                  'live_confidence': round(float(live_conf[i]), 2),
+                                  'candidate_confidence': round(float(candidate_conf[i]), 2)})
+
+    def report(self):
+        n = self.samples
+        return {
+            'live_version': self.live_version,
+            'candidate_version': self.candidate_version,
+            'samples': n,
+            'agreement': round(self.agreed / n, 4) if n else None,
+            'mean_confidence_delta': round(self.confidence_delta_sum / n, 3) if n else None,
+            'mean_abs_confidence_delta': round(self.abs_confidence_delta_sum / n, 3) if n else None,
+            'live_us_per_row': round(self.live_seconds / n * 1e6, 1) if n else None,
+            'candidate_us_per_row': round(self.candidate_seconds / n * 1e6, 1) if n else None,
+            'candidate_us_per_row_p95': (round(float(np.percentile(self.candidate_row_us, 95)), 1)
+                                         if self.candidate_row_us else None),
+            'top_changes': [{'live': live, 'candidate': candidate, 'count': count}
+                            for (live, candidate), count in self.changes.most_common(10)],
+            'recent_disagreements': list(self.examples),
+        }
+
+
+class ShadowEvaluator:
+    """Samples recommender inputs and compares candidate models with the live ones off the request path.
+
+    offer() costs a random draw and, for sampled inputs, a non-blocking put: at most
+    `max_queue` samples wait, and more are dropped (counted in the report) rather than
+    queued, so memory stays bounded under load. A background thread scores up to
+    `max_batch_size` samples at a time, at most every `flush_interval` seconds while
+    samples trickle in. The statistics restart whenever candidates are loaded or the
+    live model version changes, so they always describe one pair of versions.
+    """
+
+    def __init__(self, sample_rate=0.0, max_queue=1000, max_batch_size=256, flush_interval=1.0):
+        self.sample_rate = sample_rate
+        self.artifact_dir = None
+        self.candidates = {}   # name -> bundle
+        self.comparisons = {}  # name -> Comparison
+        self._lock = threading.Lock()
+        self._queue = WriteBehindQueue(self._score, max_batch_size, flush_interval, max_queue,
+                                       name='shadow-evaluation', drain_at_exit=False)
+
+    def load_candidates(self, artifact_dir=None, sample_rate=None):
+        """Reads the candidate models from `artifact_dir` (default: <model dir>/candidate).
+
+        Models without a usable artifact there are not evaluated. Returns the loaded names.
+        """
+        artifact_dir = artifact_dir or os.path.join(model_store.ARTIFACT_DIR, 'candidate')
+        candidates = {}
+        for name, (read, *_rest) in _MODELS.items():
+            bundle = read(artifact_dir)
+            if bundle is not None:
+                candidates[name] = bundle
+        with self._lock:
+            self.artifact_dir = artifact_dir
+            self.candidates = candidates
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            self.comparisons = {}
+        if candidates:
+            versions = ', '.join(f"{name} {bundle['version']}" for name, bundle in candidates.items())
+            print(f"✅ Shadow evaluation: candidate {versions} on {self.sample_rate:.1%} of requests")
+        else:
+            print(f"Warning: No candidate models found in {artifact_dir}; shadow evaluation is idle.")
+        return sorted(candidates)
+
+    def stop(self):
+        """Stops sampling and drops the candidates; the last report stays available."""
+        with self._lock:
+            self.candidates = {}
+
+    def offer(self, sample):
+        """Queues an input dict (N, P, K, temp, hum, ph, rain, soil_type) with probability sample_rate."""
+        if self.candidates and random.random() < self.sample_rate:
+            self._queue.put(sample)
+
+    def _score(self, samples):
+        with self._lock:
+            candidates = dict(self.candidates)
+        for name, candidate in candidates.items():
+            _read, live_bundle, rows_for, score = _MODELS[name]
+            live = live_bundle()
+            if live is None:
+                continue
+            rows = rows_for(samples)
+            started = time.perf_counter()
+            live_scores = score(rows, live)
+            live_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            candidate_scores = score(rows, candidate)
+            candidate_seconds = time.perf_counter() - started
+
+            with self._lock:
+                key = (live['version'], candidate['version'])
+                comparison = self.comparisons.get(name)
+                if comparison is None or (comparison.live_version, comparison.candidate_version) != key:
+                    comparison = self.comparisons[name] = Comparison(*key)
+                comparison.add(samples, live_scores, candidate_scores, live_seconds, candidate_seconds)
+
+    def report(self):
+        with self._lock:
+            comparisons = {name: comparison.report() for name, comparison in self.comparisons.items()}
+            candidates = {name: {'version': bundle['version'], 'accuracy': bundle['accuracy']}
+                          for name, bundle in self.candidates.items()}
+        queue = self._queue.stats()
+        return {
+            'active': bool(candidates) and self.sample_rate > 0,
+            'sample_rate': self.sample_rate,
+            'artifact_dir': self.artifact_dir,
+            'candidates': candidates,
+            'queue': {'pending': queue['pending'], 'scored': queue['written'], 'batches': queue['batches'],
+                      'dropped': queue['dropped'], 'failed': queue['failed']},
+            'models': comparisons,
+        }
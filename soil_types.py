@@ -0,0 +1,36 @@
+# soil_types.py
+# --------------------------------------------------------------------------------
+# The soil vocabulary shared by training, prediction, the recommender form and the
+# district tables. Every label in Fertilizer_data.csv, plus the short names the form
+# and API have always accepted, maps to one code. Codes follow a texture scale from
+# sandy to clayey, so neighbouring codes are similar soils for the fertilizer KNN.
+# Standard library only, so the web app can use it before the ML stack is loaded.
+# --------------------------------------------------------------------------------
+
+# Canonical names, in code order
+SOIL_TYPES = [
+    'Sandy', 'Loamy Sand', 'Sandy Loam', 'Loamy', 'Silty Loam', 'Alluvial',
+    'Red Loam', 'Clay Loam', 'Red Clay Loam', 'Clay', 'Black Soil',
+]
+
+# Other spellings found in the data or sent by older clients
+SOIL_ALIASES = {'Sand': 'Sandy', 'Loam': 'Loamy', 'Red': 'Red Loam', 'Clayey': 'Clay', 'Black': 'Black Soil'}
+
+DEFAULT_SOIL_TYPE = 'Loamy'  # used for unknown soil types
+
+SOIL_CODES = {name: code for code, name in enumerate(SOIL_TYPES)}
+SOIL_CODES.update({alias: SOIL_CODES[name] for alias, name in SOIL_ALIASES.items()})
+
+# Case- and whitespace-insensitive lookup: normalized label -> canonical name
+_CANONICAL = {name.lower(): SOIL_ALIASES.get(name, name) for name in SOIL_CODES}
+
+
+def canonical_soil_type(label):
+    """The canonical name for any known spelling of a soil type, or None if unknown."""
+    return _CANONICAL.get(' '.join(str(label).split()).lower())
+
+
+def soil_code(label):
+    """The numeric code for a soil type, or None if unknown."""
+    name = canonical_soil_type(label)
+    return None if name is None else SOIL_CODES[name]
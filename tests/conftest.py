@@ -0,0 +1,39 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def models():
+    """Loads the crop and fertilizer models (training them on first use)."""
+    import model_store
+    crop_ok, fert_ok = model_store.load_or_train_all(
+        os.path.join(ROOT, 'Crop_data.csv'), os.path.join(ROOT, 'Fertilizer_data.csv'),
+        artifact_dir=os.path.join(ROOT, model_store.ARTIFACT_DIR),
+    )
+    assert crop_ok and fert_ok
+
+
+TEST_API_KEY = 'test-api-key'
+
+
+@pytest.fixture(scope='session')
+def flask_app(tmp_path_factory):
+    """app.py imported against a scratch database, with its models loaded."""
+    os.environ['AGRI_AI_DATABASE_URL'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    os.environ['AGRI_AI_API_KEYS'] = TEST_API_KEY
+    os.environ['AGRI_AI_MODEL_WATCH_INTERVAL'] = '0'
+    os.chdir(ROOT)  # app.py reads the CSVs and model artifacts relative to the working directory
+    import app
+    app.app.config['TESTING'] = True
+    assert app.model_loader.wait(timeout=300)
+    return app
+
+
+@pytest.fixture
+def client(flask_app):
+    return flask_app.app.test_client()
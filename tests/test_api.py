@@ -0,0 +1,54 @@
+import concurrent.futures
+
+import pytest
+
+import recommendation_service
+from conftest import TEST_API_KEY
+
+HEADERS = {'X-API-Key': TEST_API_KEY}
+SAMPLE = {'N': 90, 'P': 42, 'K': 43, 'temp': 20.8, 'hum': 82, 'ph': 6.5, 'rain': 202.9, 'soil_type': 'Loamy'}
+
+
+def _raise(error):
+    def score(*args, **kwargs):
+        raise error
+    return score
+
+
+def test_recommend_requires_a_key(client):
+    assert client.post('/api/v1/recommend', json=SAMPLE).status_code == 401
+
+
+def test_recommend(client):
+    response = client.post('/api/v1/recommend', json=SAMPLE, headers=HEADERS)
+    assert response.status_code == 200
+    assert response.get_json()['crop']
+
+
+def test_recommend_rejects_bad_input(client):
+    response = client.post('/api/v1/recommend', json={'N': 1}, headers=HEADERS)
+    assert response.status_code == 400
+    assert 'Missing field' in response.get_json()['error']
+
+
+def test_recommend_timeout_is_a_retryable_503(client, monkeypatch):
+    monkeypatch.setattr(recommendation_service.BATCHER, 'score', _raise(concurrent.futures.TimeoutError()))
+    response = client.post('/api/v1/recommend', json=dict(SAMPLE, N=91.5), headers=HEADERS)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    assert response.is_json
+
+
+def test_recommend_scoring_error_is_a_json_500(client, monkeypatch):
+    monkeypatch.setattr(recommendation_service.BATCHER, 'score', _raise(RuntimeError('boom')))
+    response = client.post('/api/v1/recommend', json=dict(SAMPLE, N=92.5), headers=HEADERS)
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'Could not score the request.'}
+
+
+@pytest.mark.parametrize('error, status', [(concurrent.futures.TimeoutError(), 503), (RuntimeError('boom'), 500)])
+def test_batch_scoring_failures_are_json(client, monkeypatch, error, status):
+    monkeypatch.setattr(recommendation_service, 'score_samples', _raise(error))
+    response = client.post('/api/v1/recommend/batch', json={'samples': [SAMPLE]}, headers=HEADERS)
+    assert response.status_code == status
+    assert response.is_json
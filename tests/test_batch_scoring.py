@@ -0,0 +1,32 @@
+import pytest
+
+import crop_recommender
+import fertilizer_recommender
+
+CROP_ROW = [90, 42, 43, 20.8, 82.0, 6.5, 202.9]
+FERTILIZER_ROW = [90, 42, 43, 20.8, 82.0, 6.5, 'Loamy']
+
+
+@pytest.mark.parametrize('samples', [[], (), iter([])])
+def test_rank_crops_batch_empty(models, samples):
+    labels, confidences = crop_recommender.rank_crops_batch(samples, top_k=3)
+    assert labels.shape == (0, 3)
+    assert confidences.shape == (0, 3)
+
+
+def test_recommend_crops_batch_empty(models):
+    labels, confidences = crop_recommender.recommend_crops_batch([])
+    assert len(labels) == 0 and len(confidences) == 0
+
+
+@pytest.mark.parametrize('samples', [[], (), iter([])])
+def test_recommend_fertilizers_batch_empty(models, samples):
+    labels, confidences = fertilizer_recommender.recommend_fertilizers_batch(samples)
+    assert len(labels) == 0 and len(confidences) == 0
+
+
+def test_batch_matches_single_row(models):
+    labels, confidences = crop_recommender.recommend_crops_batch([CROP_ROW, CROP_ROW])
+    assert list(labels) == [crop_recommender.recommend_crop(*CROP_ROW)[0]] * 2
+    fert_labels, _ = fertilizer_recommender.recommend_fertilizers_batch([FERTILIZER_ROW])
+    assert len(fert_labels) == 1
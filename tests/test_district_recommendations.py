@@ -0,0 +1,41 @@
+import json
+
+import district_recommendations
+from district_recommendations import DistrictTables, load_district_profiles
+
+
+def _write_profiles(tmp_path, monkeypatch, overrides):
+    path = tmp_path / 'district_profiles.json'
+    path.write_text(json.dumps(overrides))
+    monkeypatch.setattr(district_recommendations, 'DISTRICT_PROFILES_PATH', str(path))
+
+
+def test_only_overridden_districts_count_as_profiled(tmp_path, monkeypatch):
+    _write_profiles(tmp_path, monkeypatch, {'Punjab': {'rain': 60}, 'Bihar/Patna': {'ph': 7.0}})
+    profiles, profiled = load_district_profiles()
+    assert profiles[('Bihar', 'Patna')]['ph'] == 7.0
+    assert profiles[('Bihar', 'Gaya')] == district_recommendations.DEFAULT_PROFILE
+    assert ('Bihar', 'Patna') in profiled and ('Bihar', 'Gaya') not in profiled
+    punjab = {('Punjab', district) for district in district_recommendations.LOCATION_DATA['Punjab']}
+    assert profiled == punjab | {('Bihar', 'Patna')}
+
+
+def test_dashboard_block_only_for_profiled_districts(models, tmp_path, monkeypatch):
+    _write_profiles(tmp_path, monkeypatch, {'Bihar/Patna': {'N': 80, 'rain': 150, 'soil_type': 'Clayey'}})
+    tables = DistrictTables()
+    assert tables.rebuild()
+
+    assert tables.for_district('Bihar', 'Gaya') is None
+    patna = tables.for_district('Bihar', 'Patna')
+    assert patna['profile']['soil_type'] == 'Clayey'
+    assert patna['crops'] and patna['fertilizer']
+    assert tables.stats()['profiled_districts'] == 1
+
+
+def test_default_profile_still_answers_grid_inputs(models, tmp_path, monkeypatch):
+    _write_profiles(tmp_path, monkeypatch, {})
+    tables = DistrictTables()
+    assert tables.rebuild()
+    profile = district_recommendations.DEFAULT_PROFILE
+    values = [profile[field] for field in district_recommendations.GRID_FIELDS]
+    assert tables.lookup(*values, profile['soil_type']) is not None
@@ -0,0 +1,64 @@
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+import crop_recommender
+from conftest import ROOT
+from forest_engine import CompiledForest, rank_trees
+
+
+@pytest.fixture(scope='module')
+def forest():
+    """A crop forest fitted on Crop_data.csv, and its training inputs."""
+    data = pd.read_csv(os.path.join(ROOT, 'Crop_data.csv'))
+    X = data[crop_recommender.CROP_FEATURES].to_numpy(dtype=float)
+    model = RandomForestClassifier(n_estimators=30, random_state=0, n_jobs=1).fit(X, data['label'])
+    return model, X
+
+
+def _subforest(model, trees):
+    subset = copy.copy(model)
+    subset.estimators_ = [model.estimators_[i] for i in trees]
+    subset.n_estimators = len(trees)
+    return subset
+
+
+def test_compiled_forest_matches_sklearn(forest):
+    model, X = forest
+    engine = CompiledForest.from_sklearn(model)
+    expected = model.predict_proba(X)
+    np.testing.assert_allclose(engine.predict_proba(X), expected, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(engine.predict(X), model.classes_[expected.argmax(axis=1)])
+
+
+def test_compiled_forest_single_row_matches_batch(forest):
+    model, X = forest
+    engine = CompiledForest.from_sklearn(model)
+    batch = engine.predict_proba(X[:50])
+    rows = np.vstack([engine.predict_proba(row) for row in X[:50]])
+    np.testing.assert_allclose(rows, batch, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('quantize', [True, False])
+def test_compact_forest_matches_sklearn(forest, quantize):
+    model, X = forest
+    engine = CompiledForest.compact(model, quantize=quantize)
+    if quantize:
+        assert engine.leaf_proba.dtype == np.uint16
+    expected = model.predict_proba(X)
+    # uint16 leaves are off by at most half a step per tree; float32 leaves by rounding
+    np.testing.assert_allclose(engine.predict_proba(X), expected, rtol=0, atol=1e-5)
+    np.testing.assert_array_equal(engine.predict(X), model.classes_[expected.argmax(axis=1)])
+
+
+def test_compact_tree_subset_matches_sklearn_subset(forest):
+    model, X = forest
+    trees = rank_trees(model, X, max_trees=10)
+    engine = CompiledForest.compact(model, trees=trees)
+    expected = _subforest(model, trees).predict_proba(X)
+    np.testing.assert_allclose(engine.predict_proba(X), expected, rtol=0, atol=1e-5)
+    np.testing.assert_array_equal(engine.predict(X), model.classes_[expected.argmax(axis=1)])
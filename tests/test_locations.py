@@ -0,0 +1,40 @@
+import gzip
+import json
+
+import location_data
+
+
+def test_locations_are_cacheable(client):
+    response = client.get('/api/v1/locations')
+    assert response.status_code == 200
+    assert json.loads(response.data) == location_data.LOCATION_DATA
+    assert response.headers['ETag'] == f'"{location_data.LOCATION_DATA_ETAG}"'
+    assert response.cache_control.public and response.cache_control.max_age > 0
+
+
+def test_locations_revalidate_with_304(client):
+    etag = client.get('/api/v1/locations').headers['ETag']
+    response = client.get('/api/v1/locations', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_locations_gzip(client):
+    response = client.get('/api/v1/locations', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data)) == location_data.LOCATION_DATA
+
+
+def test_search_returns_every_state_of_a_duplicate_district(client):
+    for district, states in [('Aurangabad', ['Bihar', 'Maharashtra']),
+                             ('Balrampur', ['Chhattisgarh', 'Uttar Pradesh']),
+                             ('Pratapgarh', ['Rajasthan', 'Uttar Pradesh'])]:
+        response = client.get('/api/v1/locations/search', query_string={'q': district.lower()})
+        assert response.get_json() == [{'district': district, 'state': state} for state in states]
+
+
+def test_search_limit(client):
+    response = client.get('/api/v1/locations/search', query_string={'q': 'a', 'limit': 3})
+    assert len(response.get_json()) == 3
+    assert client.get('/api/v1/locations/search', query_string={'q': ' '}).get_json() == []
@@ -0,0 +1,76 @@
+import os
+import threading
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def test_concurrent_items_share_a_batch():
+    batches = []
+
+    def score_batch(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(score_batch, max_batch_size=8, max_wait_ms=200)
+    futures = [batcher.submit(i) for i in range(6)]
+
+    assert [future.result(5) for future in futures] == [0, 2, 4, 6, 8, 10]
+    assert batches == [[0, 1, 2, 3, 4, 5]]
+    assert batcher.stats()['mean_batch_size'] == 6
+
+
+def test_max_batch_size_splits_batches():
+    sizes = []
+    start = threading.Event()
+
+    def score_batch(items):
+        start.wait(5)
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(score_batch, max_batch_size=3, max_wait_ms=200)
+    futures = [batcher.submit(i) for i in range(7)]
+    start.set()
+    assert [future.result(5) for future in futures] == list(range(7))
+    assert max(sizes) <= 3
+
+
+def test_scoring_error_fails_every_future():
+    def score_batch(items):
+        raise ValueError('model exploded')
+
+    batcher = MicroBatcher(score_batch, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError, match='model exploded'):
+            future.result(5)
+
+
+def test_too_few_results_fail_every_future_instead_of_hanging():
+    batcher = MicroBatcher(lambda items: items[:-1], max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        # A timeout here would mean a future was left unresolved
+        with pytest.raises(RuntimeError, match='2 results for 3 items'):
+            future.result(5)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+def test_restarts_its_thread_after_fork():
+    batcher = MicroBatcher(lambda items: [item + 1 for item in items], max_wait_ms=1)
+    assert batcher.score(1, timeout=5) == 2
+
+    pid = os.fork()
+    if pid == 0:
+        # The parent's scoring thread doesn't exist here; the batcher must start its own
+        try:
+            ok = batcher.score(41, timeout=5) == 42 and batcher._thread.is_alive()
+        except BaseException:
+            ok = False
+        os._exit(0 if ok else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert batcher.score(2, timeout=5) == 3
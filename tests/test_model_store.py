@@ -0,0 +1,60 @@
+import os
+import threading
+
+import pytest
+
+import model_store
+
+
+def _hold_lock(artifact_dir):
+    """Holds artifact_lock on a background thread until the returned event is set."""
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with model_store.artifact_lock(artifact_dir):
+            held.set()
+            release.wait(30)
+    thread = threading.Thread(target=hold, daemon=True)
+    thread.start()
+    assert held.wait(5)
+    return thread, release
+
+
+def test_artifact_lock_excludes_other_threads(tmp_path):
+    thread, release = _hold_lock(str(tmp_path))
+    acquired = threading.Event()
+
+    def take():
+        with model_store.artifact_lock(str(tmp_path)):
+            acquired.set()
+    threading.Thread(target=take, daemon=True).start()
+    assert not acquired.wait(0.3)
+    release.set()
+    assert acquired.wait(5)
+    thread.join(5)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="needs os.fork")
+def test_child_forked_while_lock_is_held_can_take_it(tmp_path):
+    # gunicorn forking its workers while the master's loader thread trains under the lock
+    thread, release = _hold_lock(str(tmp_path))
+    pid = os.fork()
+    if pid == 0:
+        acquired = threading.Event()
+
+        def take():
+            with model_store.artifact_lock(str(tmp_path)):
+                acquired.set()
+        threading.Thread(target=take, daemon=True).start()
+        os._exit(0 if acquired.wait(10) else 1)
+
+    release.set()
+    thread.join(5)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+
+
+def test_save_artifact_leaves_no_temp_files(tmp_path):
+    model_store.save_artifact('demo', {'model': [1, 2, 3]}, '0' * 64, str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ['demo.joblib']
+    assert model_store.load_artifact('demo', '0' * 64, str(tmp_path))['model'] == [1, 2, 3]
@@ -0,0 +1,154 @@
+import gzip
+import os
+import types
+
+import pytest
+from flask import Flask
+
+import page_cache
+
+
+@pytest.fixture
+def pages(flask_app):
+    flask_app.static_pages.clear()
+    return flask_app.static_pages
+
+
+@pytest.fixture
+def fake_brotli(monkeypatch):
+    """Stands in for the optional brotli package, so negotiation is tested without it."""
+    monkeypatch.setattr(page_cache, 'brotli', types.SimpleNamespace(compress=lambda body, quality: b'br:' + body))
+
+
+def _user_id(flask_app, username):
+    app, db = flask_app.app, flask_app.db
+    with app.app_context():
+        user = db.session.execute(db.select(flask_app.User).filter_by(username=username)).scalar_one_or_none()
+        if user is None:
+            user = flask_app.User(username=username, password_hash='unused')
+            db.session.add(user)
+            db.session.commit()
+        return str(user.id)
+
+
+def _log_in(client, flask_app, username):
+    user_id = _user_id(flask_app, username)
+    with client.session_transaction() as session:
+        session['_user_id'] = user_id
+        session['_fresh'] = True
+
+
+def test_cached_page_revalidates_with_304(client, pages):
+    first = client.get('/about', headers={'Accept-Encoding': 'identity'})
+    assert first.status_code == 200 and first.headers['ETag']
+    assert first.cache_control.no_cache and first.cache_control.private
+
+    again = client.get('/about', headers={'Accept-Encoding': 'identity', 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.data == b''
+    assert pages.stats()['hits'] == 1 and pages.stats()['not_modified'] == 1
+
+
+def test_pages_are_cached_per_user(client, flask_app, pages):
+    _log_in(client, flask_app, 'page-cache-alice')
+    alice = client.get('/about', headers={'Accept-Encoding': 'identity'})
+    _log_in(client, flask_app, 'page-cache-bob')
+    bob = client.get('/about', headers={'Accept-Encoding': 'identity'})
+
+    assert b'Hello, page-cache-alice!' in alice.data
+    assert b'Hello, page-cache-bob!' in bob.data and b'page-cache-alice' not in bob.data
+    assert alice.headers['ETag'] != bob.headers['ETag']
+    # Bob's ETag must not revalidate Alice's page
+    _log_in(client, flask_app, 'page-cache-alice')
+    assert client.get('/about', headers={'Accept-Encoding': 'identity',
+                                         'If-None-Match': bob.headers['ETag']}).status_code == 200
+
+
+def test_pending_flash_messages_bypass_the_cache(client, pages):
+    client.get('/about')
+    with client.session_transaction() as session:
+        session['_flashes'] = [('info', 'One-off notice')]
+    flashed = client.get('/about', headers={'Accept-Encoding': 'identity'})
+    assert b'One-off notice' in flashed.data
+    assert 'ETag' not in flashed.headers
+
+    after = client.get('/about', headers={'Accept-Encoding': 'identity'})
+    assert b'One-off notice' not in after.data
+    assert pages.stats()['size'] == 1
+
+
+def test_post_bypasses_the_cache(client, pages):
+    client.get('/contact')
+    response = client.post('/contact', data={'message': 'hi'})
+    assert response.status_code == 302
+    # The flash set by the POST shows on the next page instead of the cached copy
+    assert b'Your message has been received!' in client.get('/contact', headers={'Accept-Encoding': 'identity'}).data
+
+
+def test_gzip_when_brotli_is_unavailable(client, pages, monkeypatch):
+    monkeypatch.setattr(page_cache, 'brotli', None)
+    plain = client.get('/about', headers={'Accept-Encoding': 'identity'})
+    response = client.get('/about', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data) == plain.data
+    assert response.headers['ETag'] != plain.headers['ETag']
+    assert {'Accept-Encoding', 'Cookie'} <= set(response.vary)
+
+
+def test_brotli_preferred_when_available(client, pages, fake_brotli):
+    response = client.get('/about', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.data.startswith(b'br:')
+    assert client.get('/about', headers={'Accept-Encoding': 'gzip;q=1, br;q=0.5'}).headers['Content-Encoding'] == 'gzip'
+
+
+def test_dynamic_responses_are_compressed(client):
+    response = client.get('/api/v1/locations/search', query_string={'q': 'a', 'limit': 50},
+                          headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.data).startswith(b'[')
+    small = client.get('/api/v1/locations/search', query_string={'q': 'pune'}, headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers  # below COMPRESS_MIN_SIZE
+
+
+@pytest.fixture
+def static_client(tmp_path, fake_brotli):
+    static = tmp_path / 'static'
+    static.mkdir()
+    (static / 'app.css').write_text('body { color: green; }\n' * 100)
+    (static / 'tiny.css').write_text('a{}')
+    app = Flask(__name__, static_folder=str(static))
+    app.view_functions['static'] = page_cache.send_static(app)
+    assert page_cache.precompress_static(str(static)) == 2  # .gz and .br of app.css
+    return app.test_client(), static
+
+
+def test_precompressed_static_files(static_client):
+    client, static = static_client
+    original = (static / 'app.css').read_bytes()
+
+    br = client.get('/static/app.css', headers={'Accept-Encoding': 'gzip, br'})
+    assert br.headers['Content-Encoding'] == 'br' and br.data == (static / 'app.css.br').read_bytes()
+    assert br.mimetype == 'text/css'
+
+    gz = client.get('/static/app.css', headers={'Accept-Encoding': 'gzip'})
+    assert gz.headers['Content-Encoding'] == 'gzip' and gzip.decompress(gz.data) == original
+
+    plain = client.get('/static/app.css')
+    assert 'Content-Encoding' not in plain.headers and plain.data == original
+    assert 'Accept-Encoding' in plain.headers['Vary']
+    for response in (br, gz, plain):
+        response.close()
+
+
+def test_stale_precompressed_copies_are_not_served(static_client):
+    client, static = static_client
+    path = static / 'app.css'
+    path.write_text('body { color: red; }\n' * 100)
+    newer = os.path.getmtime(path.with_suffix('.css.gz')) + 10
+    os.utime(path, (newer, newer))
+
+    response = client.get('/static/app.css', headers={'Accept-Encoding': 'gzip, br'})
+    assert 'Content-Encoding' not in response.headers and b'red' in response.data
+    response.close()
+    # The next startup rewrites both copies
+    assert page_cache.precompress_static(str(static)) == 2
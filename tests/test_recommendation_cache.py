@@ -0,0 +1,85 @@
+import pytest
+
+import crop_recommender
+import model_store
+import recommendation_cache
+from recommendation_cache import RECOMMENDATION_CACHE, RecommendationCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(recommendation_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def scored(monkeypatch):
+    """Replaces rank_crops with a stub that records the inputs it was called with."""
+    calls = []
+
+    def rank_crops(**inputs):
+        calls.append(inputs)
+        return [('rice', 100.0)]
+    monkeypatch.setattr(crop_recommender, 'rank_crops', rank_crops)
+    RECOMMENDATION_CACHE.configure(maxsize=16)
+    yield calls
+    RECOMMENDATION_CACHE.configure(maxsize=4096)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = RecommendationCache(maxsize=2)
+    cache.get_or_compute('a', lambda: 1)
+    cache.get_or_compute('b', lambda: 2)
+    cache.get_or_compute('a', lambda: 'recomputed')  # 'a' is now the most recent
+    cache.get_or_compute('c', lambda: 3)
+
+    assert cache.stats()['size'] == 2
+    assert cache.get_or_compute('a', lambda: 'recomputed') == 1
+    assert cache.get_or_compute('b', lambda: 'recomputed') == 'recomputed'
+
+
+def test_ttl_expires_entries(clock):
+    cache = RecommendationCache(maxsize=8, ttl=10)
+    cache.get_or_compute('a', lambda: 1)
+    clock[0] += 9
+    assert cache.get_or_compute('a', lambda: 2) == 1
+    clock[0] += 2
+    assert cache.get_or_compute('a', lambda: 2) == 2
+    assert cache.stats()['hits'] == 1
+
+
+def test_model_change_clears_the_cache():
+    RECOMMENDATION_CACHE.configure(maxsize=16)
+    RECOMMENDATION_CACHE.get_or_compute('a', lambda: 1)
+    model_store.notify_model_changed('crop')
+    assert RECOMMENDATION_CACHE.stats()['size'] == 0
+    assert RECOMMENDATION_CACHE.get_or_compute('a', lambda: 2) == 2
+
+
+def test_clear_during_compute_does_not_store_stale_result():
+    cache = RecommendationCache(maxsize=8)
+
+    def compute():
+        cache.clear()  # e.g. a model swap while this miss was scoring
+        return 'stale'
+
+    assert cache.get_or_compute('a', compute) == 'stale'
+    assert cache.stats()['size'] == 0
+
+
+def test_quantized_inputs_share_one_entry(scored):
+    first = recommendation_cache.cached_rank_crops(90.001, 42, 43, 20.8, 82, 6.5, 202.9)
+    second = recommendation_cache.cached_rank_crops(90.004, 42, 43, 20.8, 82, 6.5, 202.9)
+    assert first == second
+    assert len(scored) == 1
+    assert RECOMMENDATION_CACHE.stats()['hits'] == 1
+
+
+def test_models_score_the_quantized_values(scored):
+    recommendation_cache.cached_rank_crops(90.004, 42.126, 43, 20.8, 82, 6.5, 202.9)
+    assert scored == [{'N': 90.0, 'P': 42.13, 'K': 43.0, 'temp': 20.8, 'hum': 82.0, 'ph': 6.5, 'rain': 202.9}]
+
+
+def test_quantize_folds_negative_zero():
+    assert str(recommendation_cache.quantize_inputs(N=-0.001)['N']) == '0.0'